@@ -0,0 +1,130 @@
+import json
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+from talon import Context, Module, actions, registry
+
+mod = Module()
+
+# Used to switch between the grammar variants we're benchmarking
+ctx = Context()
+
+# Maps from hat style grammar variant to the tags that enable it
+HAT_STYLE_VARIANTS = {
+    "nested": [],
+    "flattened": ["user.cursorless_flattened_hat_styles"],
+}
+
+GLYPH_SCOPE_TYPE_STRATEGIES = ["flattened", "capture"]
+
+SCOPE_TYPE_LISTS = [
+    "user.cursorless_scope_type_flattened",
+    "user.cursorless_scope_type_flattened_plural",
+]
+
+
+def benchmark_variants(
+    variants: dict[str, Callable[[], dict[str, Any]]],
+    phrase: str,
+    iterations: int,
+) -> dict[str, dict[str, Any]]:
+    """
+    Benchmark recognizing `phrase` with each grammar variant, in spoken form
+    test mode so that no commands are actually run. Each variant is enabled by
+    calling its function, which can return extra results. The first
+    recognition after switching variants includes recompiling the grammar, so
+    we report it separately from the median of the following recognitions.
+    """
+    results: dict[str, dict[str, Any]] = {}
+
+    actions.user.private_cursorless_spoken_form_test_mode(True)
+
+    try:
+        for variant, enable in variants.items():
+            result = enable()
+
+            start = time.perf_counter()
+            actions.mimic(phrase)
+            result["firstMs"] = to_ms(time.perf_counter() - start)
+
+            timings: list[float] = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                actions.mimic(phrase)
+                timings.append(time.perf_counter() - start)
+            result["medianMs"] = to_ms(statistics.median(timings))
+
+            results[variant] = result
+    finally:
+        ctx.tags = []
+        ctx.settings = {}
+        actions.user.private_cursorless_refresh_grapheme_spoken_forms()
+        actions.user.private_cursorless_spoken_form_test_mode(False)
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+def enable_tags(tags: list[str]) -> Callable[[], dict[str, Any]]:
+    def enable():
+        ctx.tags = tags
+        return {}
+
+    return enable
+
+
+def enable_glyph_scope_type_strategy(strategy: str) -> Callable[[], dict[str, Any]]:
+    def enable():
+        ctx.settings = {"user.cursorless_glyph_scope_type_strategy": strategy}
+
+        start = time.perf_counter()
+        actions.user.private_cursorless_refresh_grapheme_spoken_forms()
+        result: dict[str, Any] = {
+            "registrationMs": to_ms(time.perf_counter() - start),
+        }
+
+        for list_name in SCOPE_TYPE_LISTS:
+            values: dict[str, str] = registry.lists[list_name][-1]
+            result[list_name] = {
+                "entries": len(values),
+                "bytes": get_list_size(values),
+            }
+
+        return result
+
+    return enable
+
+
+def get_list_size(values: dict[str, str]) -> int:
+    """Approximate memory used by a list, including its keys and values"""
+    return sys.getsizeof(values) + sum(
+        sys.getsizeof(key) + sys.getsizeof(value) for key, value in values.items()
+    )
+
+
+def to_ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+@mod.action_class
+class Actions:
+    def private_cursorless_benchmark_hat_styles(
+        phrase: str = "take blue fox air", iterations: int = 20
+    ) -> str:
+        """Benchmark recognizing decorated symbols using nested vs flattened hat style lists"""
+        variants = {
+            variant: enable_tags(tags) for variant, tags in HAT_STYLE_VARIANTS.items()
+        }
+        return json.dumps(benchmark_variants(variants, phrase, iterations))
+
+    def private_cursorless_benchmark_glyph_scope_types(
+        phrase: str = "take every glyph dollar", iterations: int = 20
+    ) -> str:
+        """Benchmark the size, registration time and recognition time of the scope type lists for each glyph scope type strategy"""
+        variants = {
+            strategy: enable_glyph_scope_type_strategy(strategy)
+            for strategy in GLYPH_SCOPE_TYPE_STRATEGIES
+        }
+        return json.dumps(benchmark_variants(variants, phrase, iterations))
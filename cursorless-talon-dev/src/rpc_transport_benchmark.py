@@ -0,0 +1,81 @@
+import json
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from talon import Module, actions, registry
+
+mod = Module()
+
+NOOP_ACTION = "private_cursorless_benchmark_noop_command"
+UNDECLARED_ACTION = "private_cursorless_benchmark_undeclared_command"
+
+
+def time_calls(function: Callable[[], Any], iterations: int) -> float:
+    """Median time of calling `function`, in microseconds"""
+    timings: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1_000_000, 3)
+
+
+def catch_key_error(first_action: str, fallback_action: str) -> Callable[[], Any]:
+    """The way we used to pick between the command server and vscode actions"""
+
+    def run():
+        try:
+            return getattr(actions.user, first_action)(
+                "cursorless.benchmark", None, None
+            )
+        except KeyError:
+            return getattr(actions.user, fallback_action)(
+                "cursorless.benchmark", None, None
+            )
+
+    return run
+
+
+def resolved(name: str) -> Callable[[], Any]:
+    """The way we pick between them now, with rpc commands resolved up front"""
+    noop = getattr(actions.user, NOOP_ACTION)
+    run_command_get = actions.user.private_cursorless_bind_rpc_command_get(
+        SimpleNamespace(name=name, and_wait=noop, no_wait=noop, get=noop)
+    )
+    return lambda: run_command_get("cursorless.benchmark", None, None)
+
+
+@mod.action_class
+class Actions:
+    def private_cursorless_benchmark_noop_command(
+        command_id: str, arg1: Any = None, arg2: Any = None
+    ):
+        """Stand-in for an rpc action, that does nothing"""
+
+    def private_cursorless_benchmark_rpc_transport_resolution(
+        iterations: int = 2000,
+    ) -> str:
+        """Benchmark the overhead of picking the rpc action for each command, by catching `KeyError` vs resolving it up front, using a no-op stand-in for the rpc actions. The command server path is when its action is declared, and the vscode path is when we have to fall back"""
+        results = {
+            "commandServer": {
+                "catchKeyErrorUs": time_calls(
+                    catch_key_error(NOOP_ACTION, NOOP_ACTION), iterations
+                ),
+                "resolvedUs": time_calls(resolved("commandServer"), iterations),
+            },
+            "vscode": {
+                "catchKeyErrorUs": time_calls(
+                    catch_key_error(UNDECLARED_ACTION, NOOP_ACTION), iterations
+                ),
+                "resolvedUs": time_calls(resolved("vscode"), iterations),
+            },
+            "resolveUs": time_calls(
+                lambda: "user.run_rpc_command_get" in registry.decls.actions,
+                iterations,
+            ),
+        }
+
+        print(json.dumps(results, indent=2))
+        return json.dumps(results)
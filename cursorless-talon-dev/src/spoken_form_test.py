@@ -87,6 +87,7 @@ class Actions:
 
             disable_modes()
             actions.mode.enable("user.cursorless_spoken_form_test")
+            actions.user.private_cursorless_update_default_vocabulary()
             actions.sound.set_microphone("None")
 
             actions.app.notify(
@@ -94,6 +95,7 @@ class Actions:
             )
         else:
             actions.mode.disable("user.cursorless_spoken_form_test")
+            actions.user.private_cursorless_update_default_vocabulary()
             enable_modes()
             actions.sound.set_microphone(saved_microphone)
 
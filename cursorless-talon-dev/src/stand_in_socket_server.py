@@ -0,0 +1,205 @@
+import json
+import os
+import socket
+import statistics
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from talon import Context, Module, actions, app, settings
+
+mod = Module()
+
+# Used to point the Cursorless socket transport at the stand-in server while
+# benchmarking
+ctx = Context()
+
+# Same framing as the Cursorless socket transport
+HEADER = struct.Struct(">I")
+# How often the server checks whether it has been stopped
+ACCEPT_TIMEOUT_SECONDS = 0.5
+
+BENCHMARK_COMMAND_ID = "cursorless.benchmark"
+
+Handler = Callable[[dict[str, Any]], Any]
+
+
+class StandInSocketServer:
+    """
+    Stand-in for the extension's socket server, that responds to each request
+    without running any command. The response value is computed by `handler`,
+    which defaults to returning `None`. The most recent requests are kept in
+    `requests`, for inspection in tests.
+    """
+
+    def __init__(self, path: str, handler: Optional[Handler] = None):
+        self.path = path
+        self.handler: Handler = handler or (lambda _request: None)
+        self.requests: deque[dict[str, Any]] = deque(maxlen=100)
+        self.server: Optional[socket.socket] = None
+        self.connections: list[socket.socket] = []
+        self.stopped = threading.Event()
+
+    def start(self):
+        Path(self.path).unlink(missing_ok=True)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen()
+        self.server.settimeout(ACCEPT_TIMEOUT_SECONDS)
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        for connection in self.connections:
+            # Wakes up the connection's thread, which then closes it
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.connections = []
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        Path(self.path).unlink(missing_ok=True)
+
+    def serve(self):
+        assert self.server is not None
+        while not self.stopped.is_set():
+            try:
+                connection, _ = self.server.accept()
+            except TimeoutError:
+                continue
+            except OSError:
+                return
+            connection.settimeout(None)
+            self.connections.append(connection)
+            threading.Thread(
+                target=self.handle_connection, args=(connection,), daemon=True
+            ).start()
+
+    def handle_connection(self, connection: socket.socket):
+        with connection:
+            while True:
+                try:
+                    request = self.read_request(connection)
+                except OSError:
+                    return
+                if request is None:
+                    return
+
+                self.requests.append(request)
+                try:
+                    response = {
+                        "id": request["id"],
+                        "returnValue": self.handler(request),
+                    }
+                except Exception as ex:
+                    response = {"id": request.get("id"), "error": str(ex)}
+
+                payload = json.dumps(response).encode("utf-8")
+                try:
+                    connection.sendall(HEADER.pack(len(payload)) + payload)
+                except OSError:
+                    return
+
+    def read_request(self, connection: socket.socket) -> Optional[dict[str, Any]]:
+        header = recv_exactly(connection, HEADER.size)
+        if header is None:
+            return None
+        (length,) = HEADER.unpack(header)
+        payload = recv_exactly(connection, length)
+        if payload is None:
+            return None
+        return json.loads(payload)
+
+
+def recv_exactly(connection: socket.socket, size: int) -> Optional[bytes]:
+    """Read `size` bytes, or return `None` if the connection is closed first"""
+    chunks: list[bytes] = []
+    remaining = size
+    while remaining > 0:
+        chunk = connection.recv(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def echo_args(request: dict[str, Any]) -> Any:
+    return request["args"] if request["returnCommandOutput"] else None
+
+
+def time_commands(iterations: int, command_id: str) -> dict[str, float]:
+    timings: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        actions.user.private_cursorless_run_rpc_command_get(command_id)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "medianMs": to_ms(statistics.median(timings)),
+        "p95Ms": to_ms(timings[int(0.95 * (len(timings) - 1))]),
+    }
+
+
+def to_ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+stand_in_server: Optional[StandInSocketServer] = None
+
+
+@mod.action_class
+class Actions:
+    def private_cursorless_start_stand_in_socket_server():
+        """Start a stand-in Cursorless socket server, which answers every Cursorless command without running it. Useful for testing the socket transport"""
+        global stand_in_server
+        if stand_in_server is not None:
+            return
+        socket_path = str(settings.get("user.cursorless_socket_path"))
+        if not socket_path:
+            app.notify("Set user.cursorless_socket_path to use the socket transport")
+            return
+        stand_in_server = StandInSocketServer(socket_path, echo_args)
+        stand_in_server.start()
+        app.notify("Stand-in Cursorless socket server started")
+
+    def private_cursorless_stop_stand_in_socket_server():
+        """Stop the stand-in Cursorless socket server"""
+        global stand_in_server
+        if stand_in_server is None:
+            return
+        stand_in_server.stop()
+        stand_in_server = None
+        app.notify("Stand-in Cursorless socket server stopped")
+
+    def private_cursorless_benchmark_socket_transport(
+        iterations: int = 200, fallback_command_id: str = ""
+    ) -> str:
+        """Benchmark round trips through the Cursorless socket transport against a stand-in server. If `fallback_command_id` is given, also benchmark running that command through the existing rpc path, so it should be a command without side effects"""
+        results: dict[str, Any] = {}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "benchmark.sock")
+            server = StandInSocketServer(socket_path, echo_args)
+            server.start()
+            ctx.settings = {"user.cursorless_socket_path": socket_path}
+
+            try:
+                results["socket"] = time_commands(iterations, BENCHMARK_COMMAND_ID)
+                server.stop()
+
+                if fallback_command_id:
+                    # Nothing is listening anymore, so commands fall back to rpc
+                    results["fallback"] = time_commands(iterations, fallback_command_id)
+            finally:
+                server.stop()
+                ctx.settings = {}
+
+        print(json.dumps(results, indent=2))
+        return json.dumps(results)
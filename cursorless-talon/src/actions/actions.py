@@ -69,23 +69,34 @@ no_wait_actions_post_sleep = {
         "{user.cursorless_simple_action} |"
         "{user.cursorless_experimental_action} |"
         "{user.cursorless_callback_action} |"
-        "{user.cursorless_call_action} |"
-        "{user.cursorless_custom_action}"
+        "{user.cursorless_call_action}"
     )
 )
-def cursorless_action_or_ide_command(m) -> dict[str, str]:
-    try:
-        value = m.cursorless_custom_action
-        type = "ide_command"
-    except AttributeError:
-        value = m[0]
-        type = "cursorless_action"
+def cursorless_builtin_action(m) -> dict[str, str]:
+    return {
+        "value": m[0],
+        "type": "cursorless_action",
+    }
+
+
+@mod.capture(rule="{user.cursorless_custom_action}")
+def cursorless_custom_action_ide_command(m) -> dict[str, str]:
     return {
-        "value": value,
-        "type": type,
+        "value": m.cursorless_custom_action,
+        "type": "ide_command",
     }
 
 
+# NB: Custom action ids are arbitrary, and may well coincide with the id of a
+# builtin action, so we tell them apart by the capture that matched rather
+# than by the value
+@mod.capture(
+    rule="<user.cursorless_builtin_action> | <user.cursorless_custom_action_ide_command>"
+)
+def cursorless_action_or_ide_command(m) -> dict[str, str]:
+    return m[0]
+
+
 @mod.action_class
 class Actions:
     @staticmethod
@@ -23,13 +23,8 @@ mod.list("cursorless_bring_move_action", desc="Cursorless bring or move actions"
 
 @mod.capture(rule="<user.cursorless_target> [<user.cursorless_destination>]")
 def cursorless_bring_move_targets(m) -> BringMoveTargets:
-    source = m.cursorless_target
-
-    try:
-        destination = m.cursorless_destination
-    except AttributeError:
-        destination = ImplicitDestination()
-
+    source = m[0]
+    destination = m[1] if len(m) > 1 else ImplicitDestination()
     return BringMoveTargets(source, destination)
 
 
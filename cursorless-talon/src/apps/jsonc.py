@@ -0,0 +1,28 @@
+import json
+import re
+from typing import Any
+
+COMMENT = r"//[^\n]*|/\*.*?\*/"
+
+# Matches, in order of precedence: strings, which we keep as is; comments; and
+# trailing commas, ie commas followed only by whitespace and comments before
+# a closing bracket. Strings are matched first so that we never look for
+# comments or commas inside them.
+JSONC_PATTERN = re.compile(
+    rf'("[^"\\]*(?:\\.[^"\\]*)*")|{COMMENT}|,(?=(?:\s|{COMMENT})*[\]}}])',
+    re.DOTALL,
+)
+
+
+def strip_jsonc(text: str) -> str:
+    """
+    Convert JSONC (JSON with comments and trailing commas, as used by VSCode
+    settings) to plain JSON, in a single pass over the text
+    """
+    # Strings are replaced by themselves, while comments and trailing commas
+    # leave group 1 unmatched, so they are removed
+    return JSONC_PATTERN.sub(lambda match: match[1] or "", text)
+
+
+def loads(text: str) -> Any:
+    return json.loads(strip_jsonc(text))
@@ -4,7 +4,7 @@ from typing import Any
 
 from talon import Context, Module, actions
 
-from ..vendor.jstyleson import loads
+from .jsonc import loads
 
 mod = Module()
 
@@ -22,6 +22,10 @@ linux_ctx.matches = r"""
 os: linux
 """
 
+# Maps from settings path to the (mtime, size) of the file when we parsed it,
+# along with the parsed settings
+settings_cache: dict[Path, tuple[tuple[int, int], dict]] = {}
+
 
 @mod.action_class
 class Actions:
@@ -33,7 +37,7 @@ class Actions:
     def vscode_get_setting(key: str, default_value: Any = None):
         """Get the value of vscode setting at the given key"""
         path: Path = actions.user.vscode_settings_path()
-        settings: dict = loads(path.read_text())
+        settings = load_settings(path)
 
         if default_value is not None:
             return settings.get(key, default_value)
@@ -64,6 +68,22 @@ class Actions:
             return fallback_value, True
 
 
+def load_settings(path: Path) -> dict:
+    """
+    Parse the settings file at the given path, reusing the previous result if
+    the file hasn't changed since
+    """
+    stat = path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = settings_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    settings: dict = loads(path.read_text())
+    settings_cache[path] = (key, settings)
+    return settings
+
+
 def pick_path(paths: list[Path]) -> Path:
     existing_paths = [path for path in paths if path.exists()]
     if not existing_paths:
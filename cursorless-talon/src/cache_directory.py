@@ -0,0 +1,32 @@
+import os
+from pathlib import Path
+
+from talon import actions
+
+
+def get_cache_directory() -> Path:
+    """
+    Get the directory for files that only we read, eg caches. It's outside
+    `~/.cursorless`, because the extension reloads its spoken forms on every
+    change to that directory. We keep it in the Talon home directory, which is
+    normally on the same filesystem as `~/.cursorless`, so that we can
+    atomically rename files from here into there.
+    """
+    return Path(actions.path.talon_home()) / "cursorless-cache"
+
+
+def write_file_atomically(path: Path, content: bytes) -> None:
+    """
+    Write a file by first writing a temporary file in the cache directory and
+    then renaming it over `path`, so that readers never see a partially
+    written file. If the rename fails, eg because the cache directory is on a
+    different filesystem, we fall back to writing `path` in place.
+    """
+    temp_path = get_cache_directory() / f"{path.name}.tmp"
+    temp_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path.write_bytes(content)
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        path.write_bytes(content)
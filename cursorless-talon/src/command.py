@@ -1,8 +1,9 @@
 import dataclasses
-from typing import Any
+from typing import Any, Optional
 
 from talon import Module, actions, speech_system
 
+from .command_timing import record_command, record_phrase_start, record_stage
 from .fallback import perform_fallback
 from .versions import COMMAND_VERSION
 
@@ -24,6 +25,7 @@ mod = Module()
 def on_phrase(d):
     global last_phrase
     last_phrase = d
+    record_phrase_start()
 
 
 speech_system.register("pre:phrase", on_phrase)
@@ -34,36 +36,43 @@ class Actions:
     @staticmethod
     def private_cursorless_command_and_wait(action: dict):
         """Execute cursorless command and wait for it to finish"""
-        response = actions.user.private_cursorless_run_rpc_command_get(
-            CURSORLESS_COMMAND_ID,
-            construct_cursorless_command(action),
-        )
-        if "fallback" in response:
-            perform_fallback(response["fallback"])
+        with record_command(action):
+            response = actions.user.private_cursorless_run_rpc_command_get(
+                CURSORLESS_COMMAND_ID,
+                construct_cursorless_command(action),
+            )
+            get_response_value(response)
 
     @staticmethod
     def private_cursorless_command_no_wait(action: dict):
         """Execute cursorless command without waiting"""
-        actions.user.private_cursorless_run_rpc_command_no_wait(
-            CURSORLESS_COMMAND_ID,
-            construct_cursorless_command(action),
-        )
+        with record_command(action):
+            actions.user.private_cursorless_run_rpc_command_no_wait(
+                CURSORLESS_COMMAND_ID,
+                construct_cursorless_command(action),
+            )
 
     @staticmethod
     def private_cursorless_command_get(action: dict):
         """Execute cursorless command and return result"""
-        response = actions.user.private_cursorless_run_rpc_command_get(
-            CURSORLESS_COMMAND_ID,
-            construct_cursorless_command(action),
-        )
-        if "fallback" in response:
+        with record_command(action):
+            response = actions.user.private_cursorless_run_rpc_command_get(
+                CURSORLESS_COMMAND_ID,
+                construct_cursorless_command(action),
+            )
+            return get_response_value(response)
+
+
+def get_response_value(response: dict) -> Any:
+    if "fallback" in response:
+        with record_stage("fallback"):
             return perform_fallback(response["fallback"])
-        if "returnValue" in response:
-            return response["returnValue"]
-        return None
+    if "returnValue" in response:
+        return response["returnValue"]
+    return None
 
 
-def construct_cursorless_command(action: dict) -> dict:
+def get_command_metadata() -> tuple[Optional[str], bool]:
     try:
         use_pre_phrase_snapshot = actions.user.did_emit_pre_phrase_signal()
     except KeyError:
@@ -71,13 +80,29 @@ def construct_cursorless_command(action: dict) -> dict:
 
     spoken_form = " ".join(last_phrase["phrase"]) if "phrase" in last_phrase else None
 
-    return make_serializable(
-        CursorlessCommand(
-            spoken_form,
-            use_pre_phrase_snapshot,
-            action,
+    return spoken_form, use_pre_phrase_snapshot
+
+
+def construct_cursorless_command(action: dict) -> dict:
+    with record_stage("serialization"):
+        spoken_form, use_pre_phrase_snapshot = get_command_metadata()
+
+        return make_serializable(
+            CursorlessCommand(
+                spoken_form,
+                use_pre_phrase_snapshot,
+                action,
+            )
         )
-    )
+
+
+# Values of these types are already serializable
+PRIMITIVE_TYPES = frozenset([str, int, float, bool, type(None)])
+
+# Maps from type to the static (class-level) fields we include when
+# serializing instances of that type, or to `None` if it isn't a dataclass.
+# This way we only need to introspect each type once.
+static_fields_cache: dict[type, Optional[dict[str, Any]]] = {}
 
 
 def make_serializable(value: Any) -> Any:
@@ -93,20 +118,31 @@ def make_serializable(value: Any) -> Any:
     Returns:
         _type_: The converted value, ready for serialization
     """
+    value_type = type(value)
+    if value_type in PRIMITIVE_TYPES:
+        return value
     if isinstance(value, dict):
         return {k: make_serializable(v) for k, v in value.items()}
     if isinstance(value, list):
         return [make_serializable(v) for v in value]
-    if dataclasses.is_dataclass(value):
-        items = {
-            **{
-                k: v
-                for k, v in vars(type(value)).items()
-                if not k.startswith("_")
-                and not isinstance(v, property)
-                and not isinstance(v, staticmethod)
-            },
-            **value.__dict__,
-        }
+
+    if value_type not in static_fields_cache:
+        static_fields_cache[value_type] = get_static_fields(value_type)
+    static_fields = static_fields_cache[value_type]
+
+    if static_fields is not None:
+        items = {**static_fields, **value.__dict__}
         return {k: make_serializable(v) for k, v in items.items() if v is not None}
     return value
+
+
+def get_static_fields(value_type: type) -> Optional[dict[str, Any]]:
+    if not dataclasses.is_dataclass(value_type):
+        return None
+    return {
+        k: v
+        for k, v in vars(value_type).items()
+        if not k.startswith("_")
+        and not isinstance(v, property)
+        and not isinstance(v, staticmethod)
+    }
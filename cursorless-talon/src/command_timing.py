@@ -0,0 +1,111 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from talon import Module, settings
+
+from .cache_directory import get_cache_directory
+
+# Lives in the cache directory, rather than `~/.cursorless` which the extension
+# watches
+COMMAND_TIMINGS_FILENAME = "command_timings.jsonl"
+# Number of commands we keep timings for
+COMMAND_TIMINGS_BUFFER_SIZE = 1000
+
+mod = Module()
+mod.setting(
+    "cursorless_record_command_timing",
+    type=bool,
+    default=False,
+    desc="Record how long each stage of every Cursorless command takes, for debugging latency. Dump the timings using `user.private_cursorless_dump_command_timings`.",
+)
+
+command_timings: deque[dict[str, Any]] = deque(maxlen=COMMAND_TIMINGS_BUFFER_SIZE)
+
+# The time the current phrase started, as wall-clock and performance counter
+# time, so that records can be both located and measured
+phrase_start: Optional[tuple[float, float]] = None
+
+# The record of the command that is currently running, if we're recording
+current_record: Optional[dict[str, Any]] = None
+
+
+def record_phrase_start() -> None:
+    """Called from the `pre:phrase` hook"""
+    global phrase_start
+    phrase_start = (time.time(), time.perf_counter())
+
+
+@contextmanager
+def record_command(action: dict) -> Iterator[None]:
+    """
+    Record the timings of the Cursorless command that runs within this block,
+    if recording is enabled. Stages within the block are timed using
+    `record_stage`.
+    """
+    global current_record
+
+    if current_record is not None or not settings.get(
+        "user.cursorless_record_command_timing"
+    ):
+        yield
+        return
+
+    start = time.perf_counter()
+    record: dict[str, Any] = {
+        "action": action.get("name"),
+        "phraseTimestamp": None,
+        "captureToActionMs": None,
+    }
+    if phrase_start is not None:
+        record["phraseTimestamp"] = phrase_start[0]
+        record["captureToActionMs"] = to_ms(start - phrase_start[1])
+
+    current_record = record
+    try:
+        yield
+    finally:
+        current_record = None
+        record["totalMs"] = to_ms(time.perf_counter() - start)
+        command_timings.append(record)
+
+
+@contextmanager
+def record_stage(stage: str) -> Iterator[None]:
+    """
+    Time a stage of the current command, eg `serialization`, `rpc` or
+    `fallback`. Does nothing if no command is being recorded.
+    """
+    record = current_record
+
+    if record is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        key = f"{stage}Ms"
+        record[key] = record.get(key, 0) + to_ms(time.perf_counter() - start)
+
+
+def to_ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+@mod.action_class
+class Actions:
+    def private_cursorless_dump_command_timings(path: Optional[str] = None) -> str:
+        """Append recorded Cursorless command timings to a jsonl file and clear them. Returns the path of the file"""
+        output_path = (
+            Path(path) if path else get_cache_directory() / COMMAND_TIMINGS_FILENAME
+        )
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "a", encoding="utf-8") as out:
+            out.writelines(json.dumps(record) + "\n" for record in command_timings)
+        command_timings.clear()
+        return str(output_path)
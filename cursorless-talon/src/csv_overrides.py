@@ -1,15 +1,19 @@
 import csv
+import hashlib
+import itertools
 import typing
 from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Container, Iterable, Optional, Sequence, TypedDict
+from typing import Callable, Iterable, Iterator, Optional, Sequence, TypedDict
 
-from talon import Context, Module, actions, app, fs, settings
+from talon import Context, Module, actions, app, scope, settings
 
 from .conventions import get_cursorless_list_name
-from .vendor.inflection import pluralize
+from .file_watcher import watch_file
+from .pluralize import pluralize
 
 SPOKEN_FORM_HEADER = "Spoken form"
 CURSORLESS_IDENTIFIER_HEADER = "Cursorless identifier"
@@ -40,6 +44,11 @@ tag: user.cursorless_default_vocabulary
 # Maps from Talon list name to a map from spoken form to value
 ListToSpokenForms = dict[str, dict[str, str]]
 
+# Maps from csv name to the normalized default values of that csv and the lists
+# to pluralize. We only assign these to `normalized_ctx` while the default
+# vocabulary is active, as it's only used for testing
+normalized_lists: dict[str, tuple[ListToSpokenForms, Sequence[str]]] = {}
+
 
 @dataclass
 class SpokenFormEntry:
@@ -48,12 +57,97 @@ class SpokenFormEntry:
     spoken_forms: list[str]
 
 
+@dataclass
+class DefaultVocabulary:
+    """
+    The validated default values of a csv, in the forms we need them for
+    initializing that csv. These only depend on the default values, so they can
+    be computed ahead of time and cached.
+    """
+
+    # Maps from spoken form to value, across all lists of the csv
+    super_default_values: dict[str, str]
+    # The default values with deactivated spoken forms enabled, for use in
+    # the default vocabulary context
+    normalized_values: ListToSpokenForms
+
+
+@dataclass(frozen=True)
+class CsvIdentifiers:
+    """
+    Hashed indexes of the identifiers that may appear in a csv, built once per
+    csv so that validating each row is a constant-time lookup
+    """
+
+    # The values of the default spoken forms
+    default: frozenset[str]
+    # Values that are accepted but not added to any list
+    ignored: frozenset[str]
+    # Values that are added to the default list
+    allowed: frozenset[str]
+    # Whether any unknown value is added to the default list
+    allow_unknown: bool
+
+    def is_valid(self, value: str) -> bool:
+        return (
+            self.allow_unknown
+            or value in self.default
+            or value in self.ignored
+            or value in self.allowed
+        )
+
+
+@dataclass
+class CsvDiagnostic:
+    """A problem with a row of a csv"""
+
+    # The index of the row in the file
+    index: int
+    message: str
+    value: str
+    # Additional information to show after the message, if any
+    detail: Optional[str] = None
+
+
 class ResultsListEntry(TypedDict):
     spoken: str
     id: str
     list: str
 
 
+class FileChangeDetector:
+    """
+    Remembers the last seen version of a file, so that we can ignore
+    filesystem events that didn't actually change its contents
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.stat_key: Optional[tuple[int, int]] = None
+        self.content_hash: Optional[bytes] = None
+
+    def has_changed(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            # Nothing to read; make sure we pick up the file once it reappears
+            self.stat_key = None
+            self.content_hash = None
+            return False
+
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if stat_key == self.stat_key:
+            return False
+        self.stat_key = stat_key
+
+        content_hash = hashlib.sha256(self.path.read_bytes()).digest()
+        if content_hash == self.content_hash:
+            return False
+        self.content_hash = content_hash
+
+        return True
+
+
 def csv_get_ctx():
     return ctx
 
@@ -62,6 +156,46 @@ def csv_get_normalized_ctx():
     return normalized_ctx
 
 
+def is_default_vocabulary_active() -> bool:
+    return "user.cursorless_default_vocabulary" in scope.get(
+        "tag", set()
+    ) or "user.cursorless_spoken_form_test" in scope.get("mode")
+
+
+# Whether the default vocabulary lists are currently assigned to
+# `normalized_ctx`
+normalized_ctx_populated = False
+
+
+def update_normalized_ctx() -> None:
+    """
+    Assign the default vocabulary lists to `normalized_ctx` if the default
+    vocabulary is active, or remove them otherwise so that we don't hold on to
+    a copy of every list outside of testing. Removing rather than emptying them
+    matters, because `normalized_ctx` overrides the user's lists while active.
+    """
+    global normalized_ctx_populated
+
+    normalized_ctx_populated = is_default_vocabulary_active()
+    if normalized_ctx_populated:
+        for values, pluralize_lists in normalized_lists.values():
+            assign_lists_to_context(normalized_ctx, values, pluralize_lists)
+    else:
+        remove_context_lists(normalized_ctx)
+
+
+def is_normalized_ctx_populated() -> bool:
+    return normalized_ctx_populated
+
+
+def is_normalized_ctx_outdated() -> bool:
+    """
+    Whether the default vocabulary has been enabled or disabled since we last
+    updated `normalized_ctx`
+    """
+    return is_default_vocabulary_active() != normalized_ctx_populated
+
+
 def init_csv_and_watch_changes(
     filename: str,
     default_values: ListToSpokenForms,
@@ -75,6 +209,8 @@ def init_csv_and_watch_changes(
     headers: Optional[Sequence[str]] = None,
     no_update_file: bool = False,
     pluralize_lists: Optional[Sequence[str]] = None,
+    default_vocabulary: Optional[DefaultVocabulary] = None,
+    restored_spoken_form_entries: Optional[Sequence[SpokenFormEntry]] = None,
 ) -> Callable[[], None]:
     """
     Initialize a cursorless settings csv, creating it if necessary, and watch
@@ -111,6 +247,13 @@ def init_csv_and_watch_changes(
             coming up with the default set of values so we don't want to persist
             those to disk
         pluralize_lists (Optional[Sequence[str]]): Create plural version of given lists
+        default_vocabulary (Optional[DefaultVocabulary]): The result of
+            `get_default_vocabulary` for `default_values`, if already known
+        restored_spoken_form_entries (Optional[Sequence[SpokenFormEntry]]): The
+            spoken form entries of the csv from the lists snapshot, if we
+            restored it because none of our input files changed since. In that
+            case its lists are already assigned, so we skip reading and
+            validating the csv, and just watch it for changes
     """
     # Don't allow both `extra_allowed_values` and `allow_unknown_values`
     assert not (extra_allowed_values and allow_unknown_values)
@@ -137,52 +280,63 @@ def init_csv_and_watch_changes(
     if deprecated and not is_file:
         return lambda: None
 
-    super_default_values = get_super_values(default_values)
+    if default_vocabulary is None:
+        default_vocabulary = get_default_vocabulary(filename, default_values)
+    super_default_values = default_vocabulary.super_default_values
 
     file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    check_for_duplicates(filename, default_values)
-    create_default_vocabulary_dicts(default_values, pluralize_lists)
-
-    def on_watch(path: str, _flags) -> None:
-        if file_path.match(path):
-            current_values, has_errors = read_file(
-                path=file_path,
-                headers=headers,
-                default_identifiers=super_default_values.values(),
-                extra_ignored_values=extra_ignored_values,
-                extra_allowed_values=extra_allowed_values,
-                allow_unknown_values=allow_unknown_values,
-            )
+    normalized_lists[filename] = (
+        default_vocabulary.normalized_values,
+        pluralize_lists,
+    )
+    if normalized_ctx_populated:
+        assign_lists_to_context(
+            normalized_ctx, default_vocabulary.normalized_values, pluralize_lists
+        )
+
+    identifiers = CsvIdentifiers(
+        default=frozenset(super_default_values.values()),
+        ignored=frozenset(extra_ignored_values),
+        allowed=frozenset(extra_allowed_values),
+        allow_unknown=allow_unknown_values,
+    )
+    change_detector = FileChangeDetector(file_path)
+
+    def on_watch() -> None:
+        if not change_detector.has_changed():
+            return
+        current_values, _diagnostics = read_file(
+            path=file_path,
+            headers=headers,
+            identifiers=identifiers,
+        )
+        # Also covers the lists that `handle_new_values` derives from ours
+        with batch_context_list_updates():
             update_dicts(
                 default_values=default_values,
                 current_values=current_values,
-                extra_ignored_values=extra_ignored_values,
-                extra_allowed_values=extra_allowed_values,
-                allow_unknown_values=allow_unknown_values,
+                identifiers=identifiers,
                 default_list_name=default_list_name,
                 pluralize_lists=pluralize_lists,
                 handle_new_values=handle_new_values,
             )
 
-    fs.watch(file_path.parent, on_watch)
-
-    if is_file:
+    if restored_spoken_form_entries is not None:
+        if handle_new_values is not None:
+            handle_new_values(restored_spoken_form_entries)
+    elif is_file:
         current_values = update_file(
             path=file_path,
             headers=headers,
             default_values=super_default_values,
-            extra_ignored_values=extra_ignored_values,
-            extra_allowed_values=extra_allowed_values,
-            allow_unknown_values=allow_unknown_values,
+            identifiers=identifiers,
             no_update_file=no_update_file,
         )
         update_dicts(
             default_values=default_values,
             current_values=current_values,
-            extra_ignored_values=extra_ignored_values,
-            extra_allowed_values=extra_allowed_values,
-            allow_unknown_values=allow_unknown_values,
+            identifiers=identifiers,
             default_list_name=default_list_name,
             pluralize_lists=pluralize_lists,
             handle_new_values=handle_new_values,
@@ -193,18 +347,28 @@ def init_csv_and_watch_changes(
         update_dicts(
             default_values=default_values,
             current_values=super_default_values,
-            extra_ignored_values=extra_ignored_values,
-            extra_allowed_values=extra_allowed_values,
-            allow_unknown_values=allow_unknown_values,
+            identifiers=identifiers,
             default_list_name=default_list_name,
             pluralize_lists=pluralize_lists,
             handle_new_values=handle_new_values,
         )
 
-    def unsubscribe() -> None:
-        fs.unwatch(file_path.parent, on_watch)
+    # Record the state of the file as we left it, so that we don't reload on
+    # the events caused by our own update
+    change_detector.has_changed()
 
-    return unsubscribe
+    return watch_file(file_path, on_watch)
+
+
+def get_default_vocabulary(
+    filename: str,
+    default_values: ListToSpokenForms,
+) -> DefaultVocabulary:
+    check_for_duplicates(filename, default_values)
+    return DefaultVocabulary(
+        super_default_values=get_super_values(default_values),
+        normalized_values=get_normalized_default_values(default_values),
+    )
 
 
 def check_for_duplicates(filename: str, default_values: ListToSpokenForms):
@@ -224,10 +388,9 @@ def is_removed(value: str) -> bool:
     return value.startswith("-")
 
 
-def create_default_vocabulary_dicts(
+def get_normalized_default_values(
     default_values: ListToSpokenForms,
-    pluralize_lists: Sequence[str],
-):
+) -> ListToSpokenForms:
     default_values_updated = {}
     for key, value in default_values.items():
         updated_dict: dict[str, str] = {}
@@ -237,15 +400,13 @@ def create_default_vocabulary_dicts(
             if active_key:
                 updated_dict[active_key] = value2
         default_values_updated[key] = updated_dict
-    assign_lists_to_context(normalized_ctx, default_values_updated, pluralize_lists)
+    return default_values_updated
 
 
 def update_dicts(
     default_values: ListToSpokenForms,
     current_values: dict[str, str],
-    extra_ignored_values: Sequence[str],
-    extra_allowed_values: Sequence[str],
-    allow_unknown_values: bool,
+    identifiers: CsvIdentifiers,
     default_list_name: str | None,
     pluralize_lists: Sequence[str],
     handle_new_values: Callable[[Sequence[SpokenFormEntry]], None] | None,
@@ -261,9 +422,9 @@ def update_dicts(
         try:
             results_map[id]["spoken"] = spoken
         except KeyError:
-            if id in extra_ignored_values:
+            if id in identifiers.ignored:
                 pass
-            elif allow_unknown_values or id in extra_allowed_values:
+            elif identifiers.allow_unknown or id in identifiers.allowed:
                 assert default_list_name is not None
                 results_map[id] = {
                     "spoken": spoken,
@@ -321,32 +482,172 @@ def assign_lists_to_context(
     lists: ListToSpokenForms,
     pluralize_lists: Sequence[str],
 ) -> None:
+    talon_lists: dict[str, dict[str, str]] = {}
     for list_name, values in lists.items():
         list_singular_name = get_cursorless_list_name(list_name)
-        ctx.lists[list_singular_name] = values
+        talon_lists[list_singular_name] = values
         if list_name in pluralize_lists:
             list_plural_name = f"{list_singular_name}_plural"
-            ctx.lists[list_plural_name] = {pluralize(k): v for k, v in values.items()}
+            talon_lists[list_plural_name] = {pluralize(k): v for k, v in values.items()}
+    update_context_lists(ctx, talon_lists)
+
+
+# Maps from context id to the lists we have assigned to that context
+assigned_context_lists: dict[int, dict[str, dict[str, str]]] = {}
+# Maps from context id to the version of each list we have assigned to that
+# context. Versions increase every time a list actually changes.
+context_list_versions: dict[int, dict[str, int]] = {}
+list_version_counter = itertools.count(1)
+# Maps from list name to the versions of that list in our contexts, and the
+# set of its values at those versions
+list_value_sets: dict[str, tuple[tuple[int, int], frozenset[str]]] = {}
+# While in `batch_context_list_updates`, maps from context id to the context
+# and the changed lists we have yet to hand to Talon
+pending_context_lists: Optional[
+    dict[int, tuple[Context, dict[str, dict[str, str]]]]
+] = None
+
+
+@contextmanager
+def batch_context_list_updates() -> Iterator[None]:
+    """
+    Defer handing list changes to Talon until the end of the block, so that
+    all the lists of each context are applied in a single `ctx.lists.update`,
+    no matter how many csvs we initialize in between. Our own view of the
+    assigned lists is updated right away, so `get_context_list` still returns
+    the latest values within the block. Nested blocks join the outermost one.
+    """
+    global pending_context_lists
+
+    if pending_context_lists is not None:
+        yield
+        return
+
+    pending_context_lists = {}
+    try:
+        yield
+    finally:
+        batches, pending_context_lists = pending_context_lists, None
+        for ctx, lists in batches.values():
+            ctx.lists.update(lists)
+
+
+def update_context_lists(ctx: Context, lists: dict[str, dict[str, str]]) -> None:
+    """
+    Assign the given Talon lists to a context in a single transaction, skipping
+    any list whose values are unchanged since we last assigned it. Talon
+    recompiles its grammar whenever context lists change, so we want to avoid
+    both no-op assignments and one recompile per list.
+
+    Args:
+        ctx (Context): The context to assign the lists to
+        lists (dict[str, dict[str, str]]): Maps from full Talon list name to
+            the new values of that list
+    """
+    assigned_lists = assigned_context_lists.setdefault(id(ctx), {})
+    # NB: The identity check lets callers that memoize their lists skip the
+    # comparison entirely; we never mutate a list once it has been assigned
+    changed_lists = {
+        list_name: values
+        for list_name, values in lists.items()
+        if assigned_lists.get(list_name) is not values
+        and assigned_lists.get(list_name) != values
+    }
+
+    if not changed_lists:
+        return
+
+    if pending_context_lists is not None:
+        _, pending_lists = pending_context_lists.setdefault(id(ctx), (ctx, {}))
+        pending_lists.update(changed_lists)
+    else:
+        ctx.lists.update(changed_lists)
+    assigned_lists.update(changed_lists)
+
+    list_versions = context_list_versions.setdefault(id(ctx), {})
+    version = next(list_version_counter)
+    for list_name in changed_lists:
+        list_versions[list_name] = version
+
+
+def remove_context_lists(ctx: Context) -> None:
+    """
+    Remove all the lists we have assigned to a context, so that it no longer
+    overrides them
+    """
+    assigned_lists = assigned_context_lists.pop(id(ctx), {})
+    context_list_versions.pop(id(ctx), None)
+    if not assigned_lists:
+        return
+
+    if pending_context_lists is not None and id(ctx) in pending_context_lists:
+        # Talon may not have some of these lists yet, so hand them over first
+        # rather than keeping track of which ones it has
+        _, pending_lists = pending_context_lists.pop(id(ctx))
+        ctx.lists.update(pending_lists)
+
+    for list_name in assigned_lists:
+        del ctx.lists[list_name]
+
+
+def get_list_values(list_name: str) -> frozenset[str]:
+    """
+    Get the values of one of our lists, across both the user's and the default
+    vocabulary, as a set. This lets captures tell which alternative they
+    matched from its value, rather than probing the match for attributes it
+    may not have. Memoized on the versions of the list.
+
+    Args:
+        list_name (str): The full Talon list name, eg `user.cursorless_hat_shape`
+
+    Returns:
+        frozenset[str]: The values of the list
+    """
+    version, values = get_context_list(ctx, list_name)
+    normalized_version, normalized_values = get_context_list(normalized_ctx, list_name)
+    key = (version, normalized_version)
+
+    cached = list_value_sets.get(list_name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    value_set = frozenset([*values.values(), *normalized_values.values()])
+    list_value_sets[list_name] = (key, value_set)
+    return value_set
+
+
+def get_context_lists(ctx: Context) -> dict[str, dict[str, str]]:
+    """
+    Get all the lists that we have assigned to the given context. Note that
+    the result must not be modified.
+    """
+    return assigned_context_lists.get(id(ctx), {})
+
+
+def get_context_list(ctx: Context, list_name: str) -> tuple[int, dict[str, str]]:
+    """
+    Get a list that we have assigned to the given context, along with its
+    version. Returns version `0` and an empty list if we've never assigned it.
+    """
+    values = assigned_context_lists.get(id(ctx), {}).get(list_name)
+    if values is None:
+        return 0, {}
+    return context_list_versions[id(ctx)][list_name], values
 
 
 def update_file(
     path: Path,
     headers: Sequence[str],
     default_values: dict[str, str],
-    extra_ignored_values: Sequence[str],
-    extra_allowed_values: Sequence[str],
-    allow_unknown_values: bool,
+    identifiers: CsvIdentifiers,
     no_update_file: bool,
 ) -> dict[str, str]:
-    current_values, has_errors = read_file(
+    current_values, diagnostics = read_file(
         path=path,
         headers=headers,
-        default_identifiers=default_values.values(),
-        extra_ignored_values=extra_ignored_values,
-        extra_allowed_values=extra_allowed_values,
-        allow_unknown_values=allow_unknown_values,
+        identifiers=identifiers,
     )
-    current_identifiers = current_values.values()
+    current_identifiers = set(current_values.values())
 
     missing: dict[str, str] = {}
     for key, value in default_values.items():
@@ -354,7 +655,7 @@ def update_file(
             missing[key] = value
 
     if missing:
-        if has_errors or no_update_file:
+        if diagnostics or no_update_file:
             print(
                 "NOTICE: New cursorless features detected, but refusing to update "
                 "csv due to errors.  Please fix csv errors above and restart talon"
@@ -396,27 +697,35 @@ def create_line(*cells: str) -> str:
     return ", ".join(cells)
 
 
-def csv_error(path: Path, index: int, message: str, value: str) -> None:
-    """Check that an expected condition is true
+def csv_error(path: Path, diagnostic: CsvDiagnostic) -> None:
+    """Report a problem with a row of a csv
 
     Note that we try to continue reading in this case so cursorless doesn't get bricked
 
     Args:
         path (Path): The path of the CSV (for error reporting)
-        index (int): The index into the file (for error reporting)
-        text (str): The text of the error message to report if condition is false
+        diagnostic (CsvDiagnostic): The problem to report
     """
-    print(f"ERROR: {path}:{index + 1}: {message} '{value}'")
+    print(
+        f"ERROR: {path}:{diagnostic.index + 1}: {diagnostic.message} '{diagnostic.value}'"
+    )
+    if diagnostic.detail is not None:
+        print(diagnostic.detail)
 
 
 def read_file(
     path: Path,
     headers: Sequence[str],
-    default_identifiers: Container[str],
-    extra_ignored_values: Sequence[str],
-    extra_allowed_values: Sequence[str],
-    allow_unknown_values: bool,
-) -> tuple[dict[str, str], bool]:
+    identifiers: CsvIdentifiers,
+) -> tuple[dict[str, str], list[CsvDiagnostic]]:
+    """
+    Read and validate a csv in a single pass over its rows. Invalid rows are
+    skipped and reported.
+
+    Returns:
+        tuple[dict[str, str], list[CsvDiagnostic]]: A map from spoken form to
+            value for each valid row, and a diagnostic for each invalid row
+    """
     with open(path) as csv_file:
         # Use `skipinitialspace` to allow spaces before quote. `, "a,b"`
         csv_reader = csv.reader(csv_file, skipinitialspace=True)
@@ -424,7 +733,7 @@ def read_file(
 
     result: dict[str, str] = {}
     used_identifiers: set[str] = set()
-    has_errors = False
+    diagnostics: list[CsvDiagnostic] = []
     seen_headers = False
 
     for i, row in enumerate(rows):
@@ -437,45 +746,45 @@ def read_file(
         if not seen_headers:
             seen_headers = True
             if row != list(headers):
-                has_errors = True
-                csv_error(path, i, "Malformed header", create_line(*row))
-                print(f"Expected '{create_line(*headers)}'")
+                diagnostics.append(
+                    CsvDiagnostic(
+                        i,
+                        "Malformed header",
+                        create_line(*row),
+                        detail=f"Expected '{create_line(*headers)}'",
+                    )
+                )
             continue
 
         if len(row) != len(headers):
-            has_errors = True
-            csv_error(
-                path,
-                i,
-                f"Malformed csv entry. Expected {len(headers)} columns.",
-                create_line(*row),
+            diagnostics.append(
+                CsvDiagnostic(
+                    i,
+                    f"Malformed csv entry. Expected {len(headers)} columns.",
+                    create_line(*row),
+                )
             )
             continue
 
         key, value = row
 
-        if (
-            value not in default_identifiers
-            and value not in extra_ignored_values
-            and value not in extra_allowed_values
-            and not allow_unknown_values
-        ):
-            has_errors = True
-            csv_error(path, i, "Unknown identifier", value)
+        if not identifiers.is_valid(value):
+            diagnostics.append(CsvDiagnostic(i, "Unknown identifier", value))
             continue
 
         if value in used_identifiers:
-            has_errors = True
-            csv_error(path, i, "Duplicate identifier", value)
+            diagnostics.append(CsvDiagnostic(i, "Duplicate identifier", value))
             continue
 
         result[key] = value
         used_identifiers.add(value)
 
-    if has_errors:
+    if diagnostics:
+        for diagnostic in diagnostics:
+            csv_error(path, diagnostic)
         app.notify("Cursorless settings error; see log")
 
-    return result, has_errors
+    return result, diagnostics
 
 
 def get_full_path(filename: str) -> Path:
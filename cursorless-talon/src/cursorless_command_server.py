@@ -1,10 +1,144 @@
-from typing import Any
+from functools import partial
+from typing import Any, Callable, NamedTuple, Optional
 
-from talon import Module, actions
+from talon import Module, actions, registry
+
+from .command_timing import record_stage
+from .socket_transport import SocketTransportUnavailable, socket_transport
 
 mod = Module()
 
 
+def run_command(
+    command_id: str,
+    arg1: Any,
+    arg2: Any,
+    *,
+    wait_for_finish: bool,
+    return_command_output: bool,
+    fallback: Callable[[str, Any, Any], Any],
+) -> Any:
+    """
+    Send a command over the Cursorless socket if it is enabled and a server is
+    listening on it, otherwise through `fallback`
+    """
+    with record_stage("rpc"):
+        sock = socket_transport.get_socket()
+        if sock is not None:
+            try:
+                return socket_transport.run_command(
+                    sock,
+                    command_id,
+                    [arg1, arg2],
+                    wait_for_finish=wait_for_finish,
+                    return_command_output=return_command_output,
+                )
+            except SocketTransportUnavailable:
+                pass
+        return fallback(command_id, arg1, arg2)
+
+
+RpcCommand = Callable[[str, Any, Any], Any]
+
+
+class RpcCommands(NamedTuple):
+    name: str
+    and_wait: RpcCommand
+    no_wait: RpcCommand
+    get: RpcCommand
+
+
+def get_command_server_commands() -> RpcCommands:
+    return RpcCommands(
+        name="commandServer",
+        and_wait=actions.user.run_rpc_command_and_wait,
+        no_wait=actions.user.run_rpc_command,
+        get=actions.user.run_rpc_command_get,
+    )
+
+
+def get_vscode_commands() -> RpcCommands:
+    return RpcCommands(
+        name="vscode",
+        and_wait=actions.user.vscode_with_plugin_and_wait,
+        no_wait=actions.user.vscode_with_plugin,
+        get=actions.user.vscode_get,
+    )
+
+
+# The rpc commands to use when the socket server isn't available. We prefer
+# the command server's actions, falling back to the older vscode actions if
+# they're not declared. Reset whenever action declarations change, so that we
+# resolve them again on the next command.
+rpc_commands: Optional[RpcCommands] = None
+
+
+def on_update_decls(decls):
+    global rpc_commands
+    rpc_commands = None
+
+
+registry.register("update_decls", on_update_decls)
+
+
+def get_rpc_commands() -> RpcCommands:
+    global rpc_commands
+    if rpc_commands is None:
+        rpc_commands = (
+            get_command_server_commands()
+            if "user.run_rpc_command_get" in registry.decls.actions
+            else get_vscode_commands()
+        )
+    return rpc_commands
+
+
+def run_rpc_command(
+    get_command: Callable[[RpcCommands], RpcCommand],
+    command_id: str,
+    arg1: Any,
+    arg2: Any,
+    commands: Optional[RpcCommands] = None,
+) -> Any:
+    """
+    Run a command through the rpc commands we resolved, or through `commands`
+    if given
+    """
+    global rpc_commands
+    if commands is not None:
+        return get_command(commands)(command_id, arg1, arg2)
+
+    commands = get_rpc_commands()
+    try:
+        return get_command(commands)(command_id, arg1, arg2)
+    except KeyError:
+        # The actions we resolved were removed, but we haven't been notified
+        # yet, in which case we retry with the actions that replaced them
+        rpc_commands = None
+        retry_commands = get_rpc_commands()
+        if retry_commands.name == commands.name:
+            raise
+        return get_command(retry_commands)(command_id, arg1, arg2)
+
+
+def run_rpc_command_and_wait(command_id: str, arg1: Any, arg2: Any):
+    run_rpc_command(lambda commands: commands.and_wait, command_id, arg1, arg2)
+
+
+def run_rpc_command_no_wait(command_id: str, arg1: Any, arg2: Any):
+    run_rpc_command(lambda commands: commands.no_wait, command_id, arg1, arg2)
+
+
+def run_rpc_command_get(
+    command_id: str,
+    arg1: Any,
+    arg2: Any,
+    commands: Optional[RpcCommands] = None,
+) -> Any:
+    return run_rpc_command(
+        lambda commands: commands.get, command_id, arg1, arg2, commands
+    )
+
+
 @mod.action_class
 class Actions:
     @staticmethod
@@ -14,10 +148,14 @@ class Actions:
         arg2: Any = None,
     ):
         """Execute command via rpc and wait for command to finish."""
-        try:
-            actions.user.run_rpc_command_and_wait(command_id, arg1, arg2)
-        except KeyError:
-            actions.user.vscode_with_plugin_and_wait(command_id, arg1, arg2)
+        run_command(
+            command_id,
+            arg1,
+            arg2,
+            wait_for_finish=True,
+            return_command_output=False,
+            fallback=run_rpc_command_and_wait,
+        )
 
     @staticmethod
     def private_cursorless_run_rpc_command_no_wait(
@@ -26,10 +164,14 @@ class Actions:
         arg2: Any = None,
     ):
         """Execute command via rpc and DON'T wait."""
-        try:
-            actions.user.run_rpc_command(command_id, arg1, arg2)
-        except KeyError:
-            actions.user.vscode_with_plugin(command_id, arg1, arg2)
+        run_command(
+            command_id,
+            arg1,
+            arg2,
+            wait_for_finish=False,
+            return_command_output=False,
+            fallback=run_rpc_command_no_wait,
+        )
 
     @staticmethod
     def private_cursorless_run_rpc_command_get(
@@ -38,7 +180,18 @@ class Actions:
         arg2: Any = None,
     ) -> Any:
         """Execute command via rpc and return command output."""
-        try:
-            return actions.user.run_rpc_command_get(command_id, arg1, arg2)
-        except KeyError:
-            return actions.user.vscode_get(command_id, arg1, arg2)
+        return run_command(
+            command_id,
+            arg1,
+            arg2,
+            wait_for_finish=True,
+            return_command_output=True,
+            fallback=run_rpc_command_get,
+        )
+
+    @staticmethod
+    def private_cursorless_bind_rpc_command_get(
+        commands: RpcCommands,
+    ) -> Callable[[str, Any, Any], Any]:
+        """Get a function that executes a command via the given rpc commands rather than the resolved ones, and returns command output. Useful for benchmarking"""
+        return partial(run_rpc_command_get, commands=commands)
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable
+
+from talon import cron, fs
+
+# Editors often save a file as a burst of events (eg write to a temp file and
+# then rename over the original), so we wait for the burst to settle before
+# dispatching
+DEBOUNCE_DELAY = "100ms"
+
+
+class DirectoryWatcher:
+    """
+    Dispatches the events of a single `fs.watch` on a directory to the
+    callbacks registered for the individual files in that directory
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        # Maps from file path to the callbacks registered for that file
+        self.callbacks: defaultdict[Path, list[Callable[[], None]]] = defaultdict(list)
+        # Maps from file path to the pending debounced dispatch for that file
+        self.pending_jobs: dict[Path, Any] = {}
+
+    def on_watch(self, path: str, _flags) -> None:
+        file_path = Path(path)
+        if file_path not in self.callbacks:
+            return
+        cron.cancel(self.pending_jobs.get(file_path))
+        self.pending_jobs[file_path] = cron.after(
+            DEBOUNCE_DELAY, lambda: self.dispatch(file_path)
+        )
+
+    def dispatch(self, path: Path) -> None:
+        self.pending_jobs.pop(path, None)
+        # Copy so that callbacks can unsubscribe themselves
+        for callback in self.callbacks.get(path, []).copy():
+            callback()
+
+    def cancel(self, path: Path) -> None:
+        job = self.pending_jobs.pop(path, None)
+        if job is not None:
+            cron.cancel(job)
+
+
+# Maps from watched directory to its watcher
+directory_watchers: dict[Path, DirectoryWatcher] = {}
+
+
+def watch_file(path: Path, callback: Callable[[], None]) -> Callable[[], None]:
+    """
+    Watch a single file for changes. All files in the same directory share one
+    `fs.watch` on that directory, and each event is only routed to the
+    callbacks of the file that actually changed. Bursts of events for the same
+    file are coalesced into a single call.
+
+    Args:
+        path (Path): The resolved path of the file to watch
+        callback (Callable[[], None]): Called whenever the file changes
+
+    Returns:
+        Callable[[], None]: A function that stops watching the file
+    """
+    directory = path.parent
+    watcher = directory_watchers.get(directory)
+
+    if watcher is None:
+        watcher = DirectoryWatcher(directory)
+        directory_watchers[directory] = watcher
+        fs.watch(directory, watcher.on_watch)
+
+    watcher.callbacks[path].append(callback)
+
+    def unsubscribe() -> None:
+        callbacks = watcher.callbacks.get(path)
+        if callbacks is None or callback not in callbacks:
+            return
+        callbacks.remove(callback)
+        if not callbacks:
+            del watcher.callbacks[path]
+            watcher.cancel(path)
+        if not watcher.callbacks and directory_watchers.get(directory) is watcher:
+            del directory_watchers[directory]
+            fs.unwatch(directory, watcher.on_watch)
+
+    return unsubscribe
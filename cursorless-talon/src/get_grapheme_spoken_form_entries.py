@@ -1,7 +1,7 @@
 import re
 import typing
 from collections import defaultdict
-from typing import Iterator, Mapping
+from typing import Iterator, Mapping, Optional
 
 from talon import app, registry, scope
 
@@ -9,6 +9,15 @@ from .spoken_forms_output import SpokenFormOutputEntry
 
 grapheme_capture_name = "user.any_alphanumeric_key"
 
+# Maps from capture name to the names of the lists that the capture expands to.
+# Cleared whenever any capture changes
+capture_lists_cache: dict[str, list[str]] = {}
+
+# The Talon lists that the current graphemes list was merged from, along with
+# that list. Talon replaces a list object when the list changes, so comparing
+# identities is enough to know whether we need to merge again
+graphemes_talon_list_cache: Optional[tuple[list[dict[str, str]], dict[str, str]]] = None
+
 
 def get_grapheme_spoken_form_entries(
     grapheme_talon_list: dict[str, str],
@@ -26,6 +35,8 @@ def get_grapheme_spoken_form_entries(
 
 
 def get_graphemes_talon_list() -> dict[str, str]:
+    global graphemes_talon_list_cache
+
     if grapheme_capture_name not in registry.captures:
         # We require this capture, and expect it to be defined. We want to show a user friendly error if it isn't present (usually indicating a problem with their community.git setup) and we think the user is going to use Cursorless.
         # However, sometimes users use different dictation engines (Vosk, Webspeech) with entirely different/smaller grammars that don't have the capture, and this code will run then, and falsely error. We don't want to show an error in that case because they don't plan to actually use Cursorless.
@@ -36,11 +47,39 @@ def get_graphemes_talon_list() -> dict[str, str]:
             )
         return {}
 
-    return {
+    talon_lists = [
+        get_id_to_talon_list(symbol_list)
+        for symbol_list in get_capture_lists(grapheme_capture_name)
+    ]
+
+    if graphemes_talon_list_cache is not None:
+        cached_talon_lists, cached_graphemes_talon_list = graphemes_talon_list_cache
+        if len(talon_lists) == len(cached_talon_lists) and all(
+            talon_list is cached_talon_list
+            for talon_list, cached_talon_list in zip(
+                talon_lists, cached_talon_lists, strict=True
+            )
+        ):
+            return cached_graphemes_talon_list
+
+    graphemes_talon_list = {
         spoken_form: id
-        for symbol_list in generate_lists_from_capture(grapheme_capture_name)
-        for spoken_form, id in get_id_to_talon_list(symbol_list).items()
+        for talon_list in talon_lists
+        for spoken_form, id in talon_list.items()
     }
+    graphemes_talon_list_cache = (talon_lists, graphemes_talon_list)
+    return graphemes_talon_list
+
+
+def get_capture_lists(capture_name: str) -> list[str]:
+    """
+    Memoized version of `generate_lists_from_capture`
+    """
+    lists = capture_lists_cache.get(capture_name)
+    if lists is None:
+        lists = list(generate_lists_from_capture(capture_name))
+        capture_lists_cache[capture_name] = lists
+    return lists
 
 
 def generate_lists_from_capture(capture_name) -> Iterator[str]:
@@ -80,11 +119,12 @@ def generate_lists_from_capture(capture_name) -> Iterator[str]:
 
 def get_id_to_talon_list(list_name: str) -> dict[str, str]:
     """
-    Given the name of a Talon list, return that list
+    Given the name of a Talon list, return that list. Note that this is the
+    list object owned by Talon, so it must not be modified
     """
     try:
         # NB: [-1] because the last list is the active one
-        return typing.cast(dict[str, str], registry.lists[list_name][-1]).copy()
+        return typing.cast(dict[str, str], registry.lists[list_name][-1])
     except Exception:
         app.notify(f"Error getting list {list_name}")
         return {}
@@ -102,3 +142,10 @@ def talon_list_to_spoken_form_map(
         inverted_list[value].append(key)
 
     return inverted_list
+
+
+def on_update_captures(_updated_captures: set[str]):
+    capture_lists_cache.clear()
+
+
+registry.register("update_captures", on_update_captures)
@@ -1,29 +1,51 @@
 from pathlib import Path
 from typing import Any
 
-from talon import Module, actions, cron, fs
-
-from ..csv_overrides import init_csv_and_watch_changes
+from talon import Context, Module, actions, cron, fs
+
+from ..csv_overrides import (
+    csv_get_ctx,
+    csv_get_normalized_ctx,
+    get_context_list,
+    get_list_values,
+    init_csv_and_watch_changes,
+    is_normalized_ctx_populated,
+    update_context_lists,
+)
 from .mark_types import DecoratedSymbol
 
 mod = Module()
 
 mod.list("cursorless_hat_color", desc="Supported hat colors for cursorless")
 mod.list("cursorless_hat_shape", desc="Supported hat shapes for cursorless")
+mod.list(
+    "cursorless_hat_style",
+    desc="Every spoken combination of an optional hat color and an optional hat shape, mapping to its hat style name",
+)
 mod.list(
     "cursorless_unknown_symbol",
     "This list contains the term that is used to refer to any unknown symbol",
 )
+mod.tag(
+    "cursorless_flattened_hat_styles",
+    desc="Match the hat color and shape of decorated symbols using the single flattened list `user.cursorless_hat_style`, rather than two optional lists",
+)
+
+# Overrides the decorated symbol capture when flattened hat styles are enabled
+flattened_hat_styles_ctx = Context()
+flattened_hat_styles_ctx.matches = r"""
+tag: user.cursorless_flattened_hat_styles
+"""
 
 
 @mod.capture(rule="<user.any_alphanumeric_key> | {user.cursorless_unknown_symbol}")
 def cursorless_grapheme(m) -> str:
-    try:
-        return m.any_alphanumeric_key
-    except AttributeError:
+    value = m[0]
+    if value in get_list_values("user.cursorless_unknown_symbol"):
         # NB: This represents unknown char in Unicode.  It will be translated
         # to "[unk]" by Cursorless extension.
         return "\ufffd"
+    return value
 
 
 @mod.capture(
@@ -31,18 +53,63 @@ def cursorless_grapheme(m) -> str:
 )
 def cursorless_decorated_symbol(m) -> DecoratedSymbol:
     """A decorated symbol"""
-    hat_color: str = getattr(m, "cursorless_hat_color", "default")
-    try:
-        hat_style_name = f"{hat_color}-{m.cursorless_hat_shape}"
-    except AttributeError:
-        hat_style_name = hat_color
+    # NB: The grapheme is always last, and is preceded by a color, a shape,
+    # both or neither
+    if len(m) == 3:
+        hat_style_name = f"{m[0]}-{m[1]}"
+    elif len(m) == 1:
+        hat_style_name = "default"
+    elif m[0] in get_list_values("user.cursorless_hat_shape"):
+        hat_style_name = f"default-{m[0]}"
+    else:
+        hat_style_name = m[0]
     return {
         "type": "decoratedSymbol",
         "symbolColor": hat_style_name,
-        "character": m.cursorless_grapheme,
+        "character": m[-1],
     }
 
 
+@flattened_hat_styles_ctx.capture(
+    "user.cursorless_decorated_symbol",
+    rule="[{user.cursorless_hat_style}] <user.cursorless_grapheme>",
+)
+def cursorless_decorated_symbol_flattened(m) -> DecoratedSymbol:
+    return {
+        "type": "decoratedSymbol",
+        "symbolColor": m[0] if len(m) == 2 else "default",
+        "character": m[-1],
+    }
+
+
+def update_hat_style_list():
+    """
+    Update the flattened hat style list from the hat color and shape lists,
+    using the default vocabulary if it is active
+    """
+    source_ctx = (
+        csv_get_normalized_ctx() if is_normalized_ctx_populated() else csv_get_ctx()
+    )
+    _, hat_colors = get_context_list(source_ctx, "user.cursorless_hat_color")
+    _, hat_shapes = get_context_list(source_ctx, "user.cursorless_hat_shape")
+    update_context_lists(
+        flattened_hat_styles_ctx,
+        {"user.cursorless_hat_style": get_hat_style_list(hat_colors, hat_shapes)},
+    )
+
+
+def get_hat_style_list(
+    hat_colors: dict[str, str],
+    hat_shapes: dict[str, str],
+) -> dict[str, str]:
+    hat_styles = hat_colors.copy()
+    for shape_spoken_form, shape in hat_shapes.items():
+        hat_styles[shape_spoken_form] = f"default-{shape}"
+        for color_spoken_form, color in hat_colors.items():
+            hat_styles[f"{color_spoken_form} {shape_spoken_form}"] = f"{color}-{shape}"
+    return hat_styles
+
+
 DEFAULT_COLOR_ENABLEMENT = {
     "blue": True,
     "green": True,
@@ -86,10 +153,12 @@ FALLBACK_SHAPE_ENABLEMENT = {
 FALLBACK_COLOR_ENABLEMENT = DEFAULT_COLOR_ENABLEMENT
 
 unsubscribe_hat_styles: Any = None
+# The arguments the hat styles csv is currently initialized with
+hat_styles_csv_args: Any = None
 
 
 def setup_hat_styles_csv(hat_colors: dict[str, str], hat_shapes: dict[str, str]):
-    global unsubscribe_hat_styles
+    global unsubscribe_hat_styles, hat_styles_csv_args
 
     (
         color_enablement_settings,
@@ -131,18 +200,30 @@ def setup_hat_styles_csv(hat_colors: dict[str, str], hat_shapes: dict[str, str])
         if shape_enablement[value]
     }
 
+    default_values = {
+        "hat_color": active_hat_colors,
+        "hat_shape": active_hat_shapes,
+    }
+    extra_ignored_values = [*hat_colors.values(), *hat_shapes.values()]
+    no_update_file = is_shape_error or is_color_error
+    args = (default_values, extra_ignored_values, no_update_file)
+
+    # Most changes to the settings file don't touch hat enablement, in which
+    # case there is nothing to reload
+    if unsubscribe_hat_styles is not None and args == hat_styles_csv_args:
+        return
+
     if unsubscribe_hat_styles is not None:
         unsubscribe_hat_styles()
 
     unsubscribe_hat_styles = init_csv_and_watch_changes(
         "hat_styles.csv",
-        {
-            "hat_color": active_hat_colors,
-            "hat_shape": active_hat_shapes,
-        },
-        extra_ignored_values=[*hat_colors.values(), *hat_shapes.values()],
-        no_update_file=is_shape_error or is_color_error,
+        default_values,
+        lambda _values: update_hat_style_list(),
+        extra_ignored_values=extra_ignored_values,
+        no_update_file=no_update_file,
     )
+    hat_styles_csv_args = args
 
     if is_shape_error or is_color_error:
         actions.app.notify("Error reading vscode settings. Restart talon; see log")
@@ -177,9 +258,14 @@ def init_hats(hat_colors: dict[str, str], hat_shapes: dict[str, str]):
         fs.watch(vscode_settings_path, on_watch)
 
     def unsubscribe():
+        global unsubscribe_hat_styles, hat_styles_csv_args
         if vscode_settings_path is not None:
             fs.unwatch(vscode_settings_path, on_watch)
+        cron.cancel(fast_reload_job)
+        cron.cancel(slow_reload_job)
         if unsubscribe_hat_styles is not None:
             unsubscribe_hat_styles()
+        unsubscribe_hat_styles = None
+        hat_styles_csv_args = None
 
     return unsubscribe
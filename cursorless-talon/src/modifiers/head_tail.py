@@ -17,20 +17,12 @@ mod.list(
 )
 def cursorless_head_tail_modifier(m) -> dict[str, str]:
     """Cursorless head and tail modifier"""
-    modifiers = []
-
-    try:
-        modifiers.append(m.cursorless_interior_modifier)
-    except AttributeError:
-        pass
-
-    try:
-        modifiers.append(m.cursorless_head_tail_swallowed_modifier)
-    except AttributeError:
-        pass
+    # NB: The optional interior and swallowed modifiers, whichever matched,
+    # follow the head/tail modifier in the same order as in the result
+    modifiers = [m[i] for i in range(1, len(m))]
 
     result = {
-        "type": m.cursorless_head_tail_modifier,
+        "type": m[0],
     }
 
     if modifiers:
@@ -1,7 +1,25 @@
-from talon import Module
+from talon import Context, Module
 
 mod = Module()
 
+mod.setting(
+    "cursorless_glyph_scope_type_strategy",
+    type=str,
+    default="flattened",
+    desc='How to match glyph scope types, eg "glyph dollar". "flattened" adds every combination of glyph spoken form and character to the flattened scope type lists. "capture" matches them using a separate capture rule instead, which keeps those lists small if you have a large alphabet.',
+)
+mod.tag(
+    "cursorless_glyph_scope_type_capture",
+    desc="Cursorless internal: match glyph scope types using a capture rule rather than the flattened scope type lists",
+)
+
+# Overrides the scope type captures when using the "capture" glyph scope type
+# strategy
+glyph_capture_ctx = Context()
+glyph_capture_ctx.matches = r"""
+tag: user.cursorless_glyph_scope_type_capture
+"""
+
 mod.list("cursorless_scope_type", desc="Supported scope types")
 mod.list("cursorless_scope_type_plural", desc="Supported plural scope types")
 
@@ -54,6 +72,37 @@ def cursorless_scope_type_plural(m) -> dict[str, str]:
     return creates_scope_type(m.cursorless_scope_type_flattened_plural)
 
 
+@glyph_capture_ctx.capture(
+    "user.cursorless_scope_type",
+    rule=(
+        "{user.cursorless_scope_type_flattened} |"
+        "{user.cursorless_glyph_scope_type} <user.any_alphanumeric_key>"
+    ),
+)
+def cursorless_scope_type_glyph_capture(m) -> dict[str, str]:
+    return creates_scope_type_from_glyph_capture(m)
+
+
+@glyph_capture_ctx.capture(
+    "user.cursorless_scope_type_plural",
+    rule=(
+        "{user.cursorless_scope_type_flattened_plural} |"
+        "{user.cursorless_glyph_scope_type_plural} <user.any_alphanumeric_key>"
+    ),
+)
+def cursorless_scope_type_plural_glyph_capture(m) -> dict[str, str]:
+    return creates_scope_type_from_glyph_capture(m)
+
+
+def creates_scope_type_from_glyph_capture(m) -> dict[str, str]:
+    if len(m) == 2:
+        return {
+            "type": "glyph",
+            "character": m[1],
+        }
+    return creates_scope_type(m[0])
+
+
 def creates_scope_type(id: str) -> dict[str, str]:
     grouping, value = id.split(".", 1)
     match grouping:
@@ -49,8 +49,6 @@ paired_delimiters = {
     )
 )
 def cursorless_wrapper_paired_delimiter(m) -> list[str]:
-    try:
-        id = m.cursorless_wrapper_only_paired_delimiter
-    except AttributeError:
-        id = m.cursorless_wrapper_selectable_paired_delimiter
-    return paired_delimiters[id]
+    # NB: Both lists map to delimiter ids, so we don't need to know which one
+    # matched
+    return paired_delimiters[m[0]]
@@ -0,0 +1,33 @@
+import re
+from functools import lru_cache
+
+from .vendor.inflection import PLURALS, UNCOUNTABLES
+
+# NB: We compile the rules ourselves rather than relying on the `re` module's
+# cache, which is shared with every other module and can be evicted
+COMPILED_PLURALS = [(re.compile(rule), replacement) for rule, replacement in PLURALS]
+
+
+@lru_cache(maxsize=4096)
+def pluralize(spoken_form: str) -> str:
+    """
+    Return the plural form of a spoken form, by pluralizing its last word, eg
+    `"funk name"` becomes `"funk names"`. The result is memoized, as we
+    pluralize the same spoken forms every time we reload the csvs.
+    """
+    prefix, separator, word = spoken_form.rpartition(" ")
+    return prefix + separator + pluralize_word(word)
+
+
+def pluralize_word(word: str) -> str:
+    if not word or word.lower() in UNCOUNTABLES:
+        return word
+    for rule, replacement in COMPILED_PLURALS:
+        match = rule.search(word)
+        if match is not None:
+            # Splice in the replacement directly, rather than matching again
+            # using `re.sub`
+            return (
+                word[: match.start()] + match.expand(replacement) + word[match.end() :]
+            )
+    return word
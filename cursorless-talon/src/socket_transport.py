@@ -0,0 +1,207 @@
+import itertools
+import json
+import select
+import socket
+import struct
+import time
+from typing import Any, Optional
+
+from talon import Module, settings
+
+# Each message is a json object, preceded by its length in bytes as a 4-byte
+# big-endian unsigned integer
+HEADER = struct.Struct(">I")
+# How long to wait before trying to connect again after failing to connect
+RECONNECT_DELAY_SECONDS = 5.0
+# How many bytes to read from the socket at a time
+RECV_SIZE = 65536
+
+mod = Module()
+mod.setting(
+    "cursorless_socket_path",
+    type=str,
+    default="",
+    desc="The Unix domain socket to send Cursorless commands to, if a server is listening on it. Leave empty to always send commands through the command server as usual.",
+)
+mod.setting(
+    "cursorless_socket_timeout",
+    type=float,
+    default=10.0,
+    desc="How long in seconds to wait for a response from the Cursorless socket server",
+)
+
+
+class SocketTransportUnavailable(Exception):
+    """
+    Raised when a request couldn't be sent to the socket server, in which case
+    it's safe to send it through another transport instead
+    """
+
+
+class SocketTransport:
+    """
+    Sends commands to a server listening on a Unix domain socket, over a
+    persistent connection. Requests are json objects of the form
+    `{"id", "commandId", "args", "waitForFinish", "returnCommandOutput"}`,
+    and the server responds to each with `{"id", "returnValue"}` or
+    `{"id", "error"}`.
+
+    We don't read the response to a command that we don't wait for, and we
+    keep the connection open when a response times out. Either way, the
+    response is skipped when we next read one, as its id doesn't match.
+    """
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.socket: Optional[socket.socket] = None
+        # Bytes received but not yet read as a message, so that a response
+        # that is only partially received when we time out isn't lost
+        self.buffer = bytearray()
+        self.request_ids = itertools.count(1)
+        # Don't try to connect again before this time
+        self.reconnect_time = 0.0
+
+    def run_command(
+        self,
+        sock: socket.socket,
+        command_id: str,
+        args: list[Any],
+        *,
+        wait_for_finish: bool,
+        return_command_output: bool,
+    ) -> Any:
+        """
+        Send a command over a socket from `get_socket` and return its output
+
+        Raises:
+            SocketTransportUnavailable: If the command wasn't delivered
+            TimeoutError: If the server didn't respond in time. Note that the
+                command may still have run, or run later
+        """
+        request_id = next(self.request_ids)
+        payload = json.dumps(
+            {
+                "id": request_id,
+                "commandId": command_id,
+                "args": args,
+                "waitForFinish": wait_for_finish,
+                "returnCommandOutput": return_command_output,
+            }
+        ).encode("utf-8")
+
+        try:
+            sock.settimeout(get_timeout())
+            sock.sendall(HEADER.pack(len(payload)) + payload)
+        except OSError as ex:
+            # The server ignores incomplete messages, so the command didn't run
+            self.close()
+            raise SocketTransportUnavailable(str(ex)) from ex
+
+        if not wait_for_finish:
+            return None
+
+        try:
+            response = self.read_response(sock, request_id)
+        except TimeoutError:
+            # Any partial response stays buffered, so the stream is still in a
+            # known state
+            raise
+        except OSError:
+            # We don't know what state the stream is in, so start over
+            self.close()
+            raise
+
+        if "error" in response:
+            raise Exception(f"Cursorless socket server error: {response['error']}")
+
+        return response.get("returnValue")
+
+    def get_socket(self) -> Optional[socket.socket]:
+        """
+        Get a connection to the socket server, or `None` if the socket
+        transport is disabled or no server is listening
+        """
+        path = str(settings.get("user.cursorless_socket_path"))
+
+        if path != self.path:
+            self.close()
+            self.path = path
+            self.reconnect_time = 0.0
+
+        if not path:
+            return None
+
+        if self.socket is not None:
+            if not is_closed_by_server(self.socket):
+                return self.socket
+            # Eg the server restarted, in which case we just reconnect
+            self.close()
+
+        if time.monotonic() < self.reconnect_time or not hasattr(socket, "AF_UNIX"):
+            return None
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            self.reconnect_time = time.monotonic() + RECONNECT_DELAY_SECONDS
+            return None
+
+        self.socket = sock
+        return sock
+
+    def read_response(self, sock: socket.socket, request_id: int) -> dict[str, Any]:
+        deadline = time.monotonic() + get_timeout()
+        while True:
+            response = self.read_message(sock, deadline)
+            if response.get("id") == request_id:
+                return response
+            # The response to an earlier command that we didn't wait for or
+            # that timed out, so nobody else will see its error
+            if "error" in response:
+                print(f"Cursorless socket server error: {response['error']}")
+
+    def read_message(self, sock: socket.socket, deadline: float) -> dict[str, Any]:
+        self.fill_buffer(sock, HEADER.size, deadline)
+        (length,) = HEADER.unpack_from(self.buffer)
+        size = HEADER.size + length
+        self.fill_buffer(sock, size, deadline)
+        payload = bytes(self.buffer[HEADER.size : size])
+        del self.buffer[:size]
+        return json.loads(payload)
+
+    def fill_buffer(self, sock: socket.socket, size: int, deadline: float) -> None:
+        """Receive until at least `size` bytes are buffered"""
+        while len(self.buffer) < size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise TimeoutError("Timed out waiting for Cursorless socket server")
+            sock.settimeout(timeout)
+            chunk = sock.recv(RECV_SIZE)
+            if not chunk:
+                raise ConnectionError("Cursorless socket server closed the connection")
+            self.buffer.extend(chunk)
+
+    def close(self) -> None:
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        self.buffer.clear()
+
+
+def is_closed_by_server(sock: socket.socket) -> bool:
+    readable, _, _ = select.select([sock], [], [], 0)
+    if not readable:
+        return False
+    try:
+        return sock.recv(1, socket.MSG_PEEK) == b""
+    except OSError:
+        return True
+
+
+def get_timeout() -> float:
+    return float(settings.get("user.cursorless_socket_timeout"))
+
+
+socket_transport = SocketTransport()
@@ -1,27 +1,59 @@
-import json
 from pathlib import Path
-from typing import Callable, Concatenate, ParamSpec, Sequence, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Concatenate,
+    Optional,
+    ParamSpec,
+    Sequence,
+    TypeVar,
+)
 
-from talon import app, cron, fs, registry
+from talon import Module, actions, app, cron, fs, registry, settings
 
 from .actions.actions import ACTION_LIST_NAMES
 from .csv_overrides import (
     SPOKEN_FORM_HEADER,
     ListToSpokenForms,
     SpokenFormEntry,
+    batch_context_list_updates,
+    get_full_path,
     init_csv_and_watch_changes,
+    is_normalized_ctx_outdated,
+    update_normalized_ctx,
 )
 from .get_grapheme_spoken_form_entries import (
     get_grapheme_spoken_form_entries,
     get_graphemes_talon_list,
     grapheme_capture_name,
 )
-from .marks.decorated_mark import init_hats
+from .marks.decorated_mark import init_hats, update_hat_style_list
+from .spoken_forms_cache import DefaultVocabularies, load_spoken_forms
 from .spoken_forms_output import SpokenFormsOutput
+from .spoken_forms_snapshot import (
+    SpokenFormEntries,
+    restore_lists_snapshot,
+    write_lists_snapshot,
+)
 from .spoken_scope_forms import init_scope_spoken_forms
 
-JSON_FILE = Path(__file__).parent / "spoken_forms.json"
-disposables: list[Callable] = []
+mod = Module()
+
+SRC_DIRECTORY = Path(__file__).parent
+JSON_FILE = SRC_DIRECTORY / "spoken_forms.json"
+HAT_STYLES_CSV = "hat_styles.csv"
+# Maps from csv name to the function that disposes its watcher
+disposables: dict[str, Callable] = {}
+spoken_forms_output_job = None
+# Recomputes only the outputs that depend on the graphemes, ie the glyph scope
+# types and the grapheme spoken forms. Set by `update()`
+refresh_graphemes: Optional[Callable[[], None]] = None
+# Materializes or drops the default vocabulary lists, after the default
+# vocabulary has been enabled or disabled. Set by `update()`
+refresh_default_vocabulary: Optional[Callable[[], None]] = None
+# Reloads the spoken forms json, re-initializing only the csvs whose defaults
+# changed. Set by `update()`
+reload_spoken_forms: Optional[Callable[[], None]] = None
 
 
 P = ParamSpec("P")
@@ -30,6 +62,7 @@ R = TypeVar("R")
 
 def auto_construct_defaults(
     spoken_forms: dict[str, ListToSpokenForms],
+    default_vocabularies: DefaultVocabularies,
     handle_new_values: Callable[[str, Sequence[SpokenFormEntry]], None],
     f: Callable[
         Concatenate[
@@ -45,7 +78,8 @@ def auto_construct_defaults(
     Decorator that automatically constructs the default values for the
     `default_values` parameter of `f` based on the spoken forms in
     `spoken_forms`, by extracting the value at the key given by the csv
-    filename.
+    filename. It also passes along the precomputed default vocabulary of the
+    csv.
 
     Note that we only ever pass `init_csv_and_watch_changes` as `f`. The
     reason we have this decorator is so that we can destructure the kwargs
@@ -53,6 +87,7 @@ def auto_construct_defaults(
 
     Args:
         spoken_forms (dict[str, ListToSpokenForms]): The spoken forms
+        default_vocabularies (DefaultVocabularies): The default vocabulary of each csv
         handle_new_values (Callable[[ListToSpokenForms], None]): A callback to be called when the lists are updated
         f (Callable[Concatenate[str, ListToSpokenForms, P], R]): Will always be `init_csv_and_watch_changes`
     """
@@ -64,6 +99,7 @@ def auto_construct_defaults(
             default_values,
             lambda new_values: handle_new_values(filename, new_values),
             *args,
+            default_vocabulary=default_vocabularies[filename],
             **kwargs,
         )
 
@@ -91,14 +127,72 @@ LIST_TO_TYPE_MAP = {
 }
 
 
-def update():
-    global disposables
+# Maps from the name of each csv, other than the hat styles csv, to the extra
+# keyword arguments we pass to `init_csv_and_watch_changes` for that csv
+CSV_INIT_KWARGS: dict[str, dict[str, Any]] = {
+    "actions.csv": {},
+    "target_connectives.csv": {},
+    "modifiers.csv": {},
+    "positions.csv": {},
+    "paired_delimiters.csv": {
+        "pluralize_lists": [
+            "selectable_only_paired_delimiter",
+            "wrapper_selectable_paired_delimiter",
+        ],
+    },
+    "special_marks.csv": {},
+    "scope_visualizer.csv": {},
+    "experimental/experimental_actions.csv": {},
+    "modifier_scope_types.csv": {
+        "pluralize_lists": [
+            "scope_type",
+            "glyph_scope_type",
+            "surrounding_pair_scope_type",
+        ],
+        "extra_allowed_values": [
+            "private.fieldAccess",
+            "textFragment",
+            "disqualifyDelimiter",
+            "pairDelimiter",
+            "interior",
+        ],
+        "default_list_name": "scope_type",
+    },
+    "experimental/actions_custom.csv": {
+        "headers": (SPOKEN_FORM_HEADER, "VSCode command"),
+        "allow_unknown_values": True,
+        "default_list_name": "custom_action",
+    },
+    "experimental/regex_scope_types.csv": {
+        "headers": (SPOKEN_FORM_HEADER, "Regex"),
+        "allow_unknown_values": True,
+        "default_list_name": "custom_regex_scope_type",
+        "pluralize_lists": ["custom_regex_scope_type"],
+    },
+}
+
 
-    for disposable in disposables:
+def update(restored_spoken_forms: Optional[SpokenFormEntries] = None):
+    """
+    Initialize all our csvs and lists, and write the spoken forms for the
+    extension
+
+    Args:
+        restored_spoken_forms (Optional[SpokenFormEntries]): The spoken form
+            entries of each csv, if we just restored them from the lists
+            snapshot. We then skip reading and validating those csvs.
+    """
+    global spoken_forms_output_job, refresh_graphemes, refresh_default_vocabulary
+    global reload_spoken_forms
+
+    for disposable in disposables.values():
         disposable()
+    disposables.clear()
+
+    cron.cancel(spoken_forms_output_job)
+    spoken_forms_output_job = None
 
-    with open(JSON_FILE, encoding="utf-8") as file:
-        spoken_forms = json.load(file)
+    spoken_forms, default_vocabularies = load_spoken_forms(JSON_FILE)
 
     initialized = False
 
@@ -124,6 +218,26 @@ def update():
                 *get_grapheme_spoken_form_entries(graphemes_talon_list),
             ]
         )
+        write_lists_snapshot(get_snapshot_input_paths(), custom_spoken_forms)
+
+    def update_spoken_forms_output_debounced():
+        # Several csvs can change at once, eg when switching branches, so we
+        # coalesce their updates into a single write
+        global spoken_forms_output_job
+        cron.cancel(spoken_forms_output_job)
+        spoken_forms_output_job = cron.after("50ms", update_spoken_forms_output)
+
+    def refresh_graphemes_talon_list():
+        nonlocal graphemes_talon_list
+        graphemes_talon_list = get_graphemes_talon_list()
+        init_scope_spoken_forms(graphemes_talon_list)
+        update_spoken_forms_output()
+
+    def refresh_default_vocabulary_lists():
+        with batch_context_list_updates():
+            update_normalized_ctx()
+            update_hat_style_list()
+            init_scope_spoken_forms(graphemes_talon_list)
 
     def handle_new_values(csv_name: str, values: Sequence[SpokenFormEntry]):
         custom_spoken_forms[csv_name] = values
@@ -131,72 +245,102 @@ def update():
             # On first run, we just do one update at the end, so we suppress
             # writing until we get there
             init_scope_spoken_forms(graphemes_talon_list)
-            update_spoken_forms_output()
-
-    handle_csv = auto_construct_defaults(
-        spoken_forms,
-        handle_new_values,
-        init_csv_and_watch_changes,
-    )
+            update_spoken_forms_output_debounced()
+
+    def init_csvs(
+        filenames: list[str],
+        restored_spoken_forms: Optional[SpokenFormEntries] = None,
+    ):
+        handle_csv = auto_construct_defaults(
+            spoken_forms,
+            default_vocabularies,
+            handle_new_values,
+            init_csv_and_watch_changes,
+        )
+        for filename in filenames:
+            disposables[filename] = handle_csv(
+                filename,
+                restored_spoken_form_entries=(
+                    restored_spoken_forms.get(filename)
+                    if restored_spoken_forms is not None
+                    else None
+                ),
+                **CSV_INIT_KWARGS[filename],
+            )
+
+    def init_hats_csv():
+        disposables[HAT_STYLES_CSV] = init_hats(
+            spoken_forms[HAT_STYLES_CSV]["hat_color"],
+            spoken_forms[HAT_STYLES_CSV]["hat_shape"],
+        )
 
-    disposables = [
-        handle_csv("actions.csv"),
-        handle_csv("target_connectives.csv"),
-        handle_csv("modifiers.csv"),
-        handle_csv("positions.csv"),
-        handle_csv(
-            "paired_delimiters.csv",
-            pluralize_lists=[
-                "selectable_only_paired_delimiter",
-                "wrapper_selectable_paired_delimiter",
-            ],
-        ),
-        handle_csv("special_marks.csv"),
-        handle_csv("scope_visualizer.csv"),
-        handle_csv("experimental/experimental_actions.csv"),
-        handle_csv(
-            "modifier_scope_types.csv",
-            pluralize_lists=[
-                "scope_type",
-                "glyph_scope_type",
-                "surrounding_pair_scope_type",
-            ],
-            extra_allowed_values=[
-                "private.fieldAccess",
-                "textFragment",
-                "disqualifyDelimiter",
-                "pairDelimiter",
-                "interior",
-            ],
-            default_list_name="scope_type",
-        ),
-        handle_csv(
-            "experimental/actions_custom.csv",
-            headers=(SPOKEN_FORM_HEADER, "VSCode command"),
-            allow_unknown_values=True,
-            default_list_name="custom_action",
-        ),
-        handle_csv(
-            "experimental/regex_scope_types.csv",
-            headers=(SPOKEN_FORM_HEADER, "Regex"),
-            allow_unknown_values=True,
-            default_list_name="custom_regex_scope_type",
-            pluralize_lists=["custom_regex_scope_type"],
-        ),
-        init_hats(
-            spoken_forms["hat_styles.csv"]["hat_color"],
-            spoken_forms["hat_styles.csv"]["hat_shape"],
-        ),
-    ]
+    def reload_spoken_forms_json():
+        nonlocal spoken_forms, default_vocabularies
+        previous_spoken_forms = spoken_forms
+        spoken_forms, default_vocabularies = load_spoken_forms(JSON_FILE)
+
+        # Only re-initialize the csvs whose defaults changed, leaving the
+        # watchers and lists of the others in place
+        changed_filenames = [
+            filename
+            for filename in disposables
+            if spoken_forms.get(filename) != previous_spoken_forms.get(filename)
+        ]
+
+        for filename in changed_filenames:
+            disposables.pop(filename)()
+
+        with batch_context_list_updates():
+            init_csvs(
+                [
+                    filename
+                    for filename in changed_filenames
+                    if filename != HAT_STYLES_CSV
+                ]
+            )
+            if HAT_STYLES_CSV in changed_filenames:
+                init_hats_csv()
+
+    # Compute the lists of every csv before handing them to Talon, so that it
+    # only recompiles its grammar once
+    with batch_context_list_updates():
+        init_csvs(list(CSV_INIT_KWARGS), restored_spoken_forms)
+        init_hats_csv()
+        init_scope_spoken_forms(graphemes_talon_list)
 
-    init_scope_spoken_forms(graphemes_talon_list)
     update_spoken_forms_output()
     initialized = True
+    refresh_graphemes = refresh_graphemes_talon_list
+    refresh_default_vocabulary = refresh_default_vocabulary_lists
+    reload_spoken_forms = reload_spoken_forms_json
+
+
+def get_snapshot_input_paths() -> list[Path]:
+    """
+    Get the files that our lists are computed from, to fingerprint the lists
+    snapshot
+    """
+    paths = [
+        JSON_FILE,
+        *[get_full_path(filename) for filename in [*CSV_INIT_KWARGS, HAT_STYLES_CSV]],
+        # The code that computes the lists, so that we don't keep restoring
+        # stale lists after an upgrade
+        *sorted(SRC_DIRECTORY.rglob("*.py")),
+    ]
+    try:
+        # Determines hat enablement
+        paths.append(actions.user.vscode_settings_path().resolve())
+    except Exception:
+        pass
+    return paths
 
 
 def on_watch(path, flags):
     if JSON_FILE.match(path):
-        update()
+        if reload_spoken_forms is not None:
+            reload_spoken_forms()
+        else:
+            update()
 
 
 update_captures_cron = None
@@ -215,13 +359,72 @@ def update_captures():
     global update_captures_cron
     update_captures_cron = None
 
+    # The csvs and spoken forms json are unaffected by the grapheme capture,
+    # so there's no need for a full update
+    if refresh_graphemes is not None:
+        refresh_graphemes()
+    else:
+        update()
+
+
+def update_default_vocabulary():
+    if refresh_default_vocabulary is not None and is_normalized_ctx_outdated():
+        refresh_default_vocabulary()
+
+
+def on_update_contexts(*_args):
+    # NB: Tags and modes are applied through contexts, so this is how we find
+    # out that the default vocabulary has been enabled or disabled
+    update_default_vocabulary()
+
+
+def on_glyph_scope_type_strategy_change(_value):
+    actions.user.private_cursorless_refresh_grapheme_spoken_forms()
+
+
+@mod.action_class
+class Actions:
+    def private_cursorless_refresh_grapheme_spoken_forms():
+        """Recompute the Cursorless lists and spoken forms that depend on graphemes, eg after changing the glyph scope type strategy"""
+        if refresh_graphemes is not None:
+            refresh_graphemes()
+
+    def private_cursorless_update_default_vocabulary():
+        """Materialize or drop the default vocabulary lists if the default vocabulary has been enabled or disabled. Call this right after enabling it, to use its lists straight away"""
+        update_default_vocabulary()
+
+
+validate_snapshot_job = None
+
+
+def validate_lists_snapshot():
+    global validate_snapshot_job
+    validate_snapshot_job = None
+
+    # Read and validate every csv, reporting any errors in them. Only the lists
+    # that differ from the snapshot get reassigned.
     update()
 
 
 def on_ready():
-    update()
+    global validate_snapshot_job
+
+    # If none of the files our lists are computed from changed since the last
+    # run, restore the lists from then in a single batch, so that Cursorless is
+    # usable straight away, and defer reading and validating the csvs
+    restored_spoken_forms = restore_lists_snapshot(get_snapshot_input_paths())
+    update(restored_spoken_forms)
+    if restored_spoken_forms is not None:
+        validate_snapshot_job = cron.after("5s", validate_lists_snapshot)
+    # In case the default vocabulary is enabled from the start
+    update_default_vocabulary()
 
     registry.register("update_captures", update_captures_debounced)
+    registry.register("update_contexts", on_update_contexts)
+    settings.register(
+        "user.cursorless_glyph_scope_type_strategy",
+        on_glyph_scope_type_strategy_change,
+    )
 
     fs.watch(JSON_FILE.parent, on_watch)
 
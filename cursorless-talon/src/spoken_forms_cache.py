@@ -0,0 +1,104 @@
+import hashlib
+import json
+import marshal
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+from .cache_directory import get_cache_directory, write_file_atomically
+from .csv_overrides import DefaultVocabulary, ListToSpokenForms, get_default_vocabulary
+
+# Cache of the parsed spoken forms json along with the validated default
+# vocabulary of every csv in it, so that warm starts can skip parsing and
+# validating the json
+SPOKEN_FORMS_CACHE_FILENAME = "spoken_forms_cache.marshal"
+# Bump this whenever the structure of the cached data changes
+SPOKEN_FORMS_CACHE_VERSION = 1
+
+SpokenForms = dict[str, Any]
+DefaultVocabularies = dict[str, DefaultVocabulary]
+
+# The hash of the json we last loaded, along with what we loaded
+loaded_spoken_forms: Optional[tuple[str, SpokenForms, DefaultVocabularies]] = None
+
+
+def load_spoken_forms(json_path: Path) -> tuple[SpokenForms, DefaultVocabularies]:
+    """
+    Load the spoken forms json, along with the default vocabulary of each csv
+    it contains. The result is cached in memory and on disk, keyed by the hash
+    of the json, so that we only parse and validate the json when it changes.
+    Note that this means we only warn about duplicate spoken forms the first
+    time we see a given version of the json.
+    """
+    global loaded_spoken_forms
+
+    content = json_path.read_bytes()
+    key = get_cache_key(content)
+
+    if loaded_spoken_forms is not None and loaded_spoken_forms[0] == key:
+        return loaded_spoken_forms[1], loaded_spoken_forms[2]
+
+    cached = read_cache(key)
+
+    if cached is not None:
+        spoken_forms, default_vocabularies = cached
+    else:
+        spoken_forms = json.loads(content)
+        default_vocabularies = {
+            filename: get_default_vocabulary(filename, default_values)
+            for filename, default_values in spoken_forms.items()
+            if filename.endswith(".csv")
+        }
+        write_cache(key, spoken_forms, default_vocabularies)
+
+    loaded_spoken_forms = (key, spoken_forms, default_vocabularies)
+    return spoken_forms, default_vocabularies
+
+
+def get_cache_key(content: bytes) -> str:
+    # Marshal format is specific to the Python version
+    python_version = ".".join(map(str, sys.version_info[:2]))
+    content_hash = hashlib.sha256(content).hexdigest()
+    return f"{SPOKEN_FORMS_CACHE_VERSION}:{python_version}:{content_hash}"
+
+
+def read_cache(key: str) -> Optional[tuple[SpokenForms, DefaultVocabularies]]:
+    try:
+        cached_key, spoken_forms, vocabularies = marshal.loads(
+            (get_cache_directory() / SPOKEN_FORMS_CACHE_FILENAME).read_bytes()
+        )
+    except Exception:
+        # Missing, corrupt, or written by a different Python version
+        return None
+
+    if cached_key != key:
+        return None
+
+    return spoken_forms, {
+        filename: DefaultVocabulary(
+            super_default_values=super_default_values,
+            normalized_values=normalized_values,
+        )
+        for filename, (super_default_values, normalized_values) in vocabularies.items()
+    }
+
+
+def write_cache(
+    key: str,
+    spoken_forms: SpokenForms,
+    default_vocabularies: DefaultVocabularies,
+) -> None:
+    vocabularies: dict[str, tuple[dict[str, str], ListToSpokenForms]] = {
+        filename: (
+            vocabulary.super_default_values,
+            vocabulary.normalized_values,
+        )
+        for filename, vocabulary in default_vocabularies.items()
+    }
+    path = get_cache_directory() / SPOKEN_FORMS_CACHE_FILENAME
+
+    try:
+        write_file_atomically(path, marshal.dumps((key, spoken_forms, vocabularies)))
+    except Exception as ex:
+        # The cache is just an optimization, so we don't bother the user
+        print(f"Error writing spoken forms cache {path}: {ex}")
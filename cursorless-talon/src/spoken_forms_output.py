@@ -1,11 +1,23 @@
+import hashlib
 import json
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, TypedDict
 
-from talon import app
+from talon import Module, app, settings
+
+from .cache_directory import write_file_atomically
 
 SPOKEN_FORMS_OUTPUT_PATH = Path.home() / ".cursorless" / "state.json"
 STATE_JSON_VERSION_NUMBER = 0
+COMPACT_STATE_JSON_VERSION_NUMBER = 1
+
+mod = Module()
+mod.setting(
+    "cursorless_compact_state_json",
+    type=bool,
+    default=False,
+    desc="Write spoken forms for the Cursorless extension in a compact format. Requires a version of the extension that supports it.",
+)
 
 
 class SpokenFormOutputEntry(TypedDict):
@@ -19,6 +31,11 @@ class SpokenFormsOutput:
     Writes spoken forms to a json file for use by the Cursorless vscode extension
     """
 
+    def __init__(self):
+        # Hash of the content of the output file, so that we can skip writes
+        # that wouldn't change it; the extension reloads on every write
+        self.content_hash: bytes | None = None
+
     def init(self):
         try:
             SPOKEN_FORMS_OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -29,20 +46,60 @@ class SpokenFormsOutput:
             print(error_message)
             app.notify(error_message)
 
+        try:
+            self.content_hash = hashlib.sha256(
+                SPOKEN_FORMS_OUTPUT_PATH.read_bytes()
+            ).digest()
+        except OSError:
+            self.content_hash = None
+
     def write(self, spoken_forms: list[SpokenFormOutputEntry]):
-        with open(SPOKEN_FORMS_OUTPUT_PATH, "w", encoding="UTF-8") as out:
-            try:
-                out.write(
-                    json.dumps(
-                        {
-                            "version": STATE_JSON_VERSION_NUMBER,
-                            "spokenForms": spoken_forms,
-                        }
-                    )
-                )
-            except Exception:
-                error_message = (
-                    f"Error writing spoken form json {SPOKEN_FORMS_OUTPUT_PATH}"
-                )
-                print(error_message)
-                app.notify(error_message)
+        if settings.get("user.cursorless_compact_state_json"):
+            content = serialize_compact(spoken_forms)
+        else:
+            content = json.dumps(
+                {
+                    "version": STATE_JSON_VERSION_NUMBER,
+                    "spokenForms": spoken_forms,
+                }
+            ).encode("UTF-8")
+
+        content_hash = hashlib.sha256(content).digest()
+
+        if content_hash == self.content_hash:
+            return
+
+        try:
+            # NB: The extension watches all of `~/.cursorless`, so we write the
+            # temporary file elsewhere to only trigger one reload
+            write_file_atomically(SPOKEN_FORMS_OUTPUT_PATH, content)
+            self.content_hash = content_hash
+        except Exception:
+            error_message = f"Error writing spoken form json {SPOKEN_FORMS_OUTPUT_PATH}"
+            print(error_message)
+            app.notify(error_message)
+
+
+def serialize_compact(spoken_forms: list[SpokenFormOutputEntry]) -> bytes:
+    """
+    Serialize spoken forms in the compact format. Each entry is a
+    `[typeIndex, id, spokenForms]` triple, where `typeIndex` indexes into the
+    interned `types` list.
+    """
+    types: dict[str, int] = {}
+    compact_spoken_forms = [
+        [
+            types.setdefault(entry["type"], len(types)),
+            entry["id"],
+            entry["spokenForms"],
+        ]
+        for entry in spoken_forms
+    ]
+
+    payload: dict[str, Any] = {
+        "version": COMPACT_STATE_JSON_VERSION_NUMBER,
+        "types": list(types),
+        "spokenForms": compact_spoken_forms,
+    }
+
+    return json.dumps(payload, separators=(",", ":")).encode("UTF-8")
@@ -0,0 +1,118 @@
+import marshal
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+from .cache_directory import get_cache_directory, write_file_atomically
+from .csv_overrides import (
+    SpokenFormEntry,
+    csv_get_ctx,
+    get_context_lists,
+    update_context_lists,
+)
+
+# Snapshot of the lists we assigned to our context and the spoken form entries
+# of each csv, along with a fingerprint of the files they were computed from,
+# so that we can restore them on startup before reading and validating every
+# csv
+LISTS_SNAPSHOT_FILENAME = "lists_snapshot.marshal"
+# Bump this whenever the structure of the snapshot changes
+LISTS_SNAPSHOT_VERSION = 2
+
+# Maps from file path to its modification time and size, or `None` if the file
+# doesn't exist
+Fingerprint = dict[str, Optional[tuple[int, int]]]
+
+# Maps from csv name to its spoken form entries
+SpokenFormEntries = dict[str, Sequence[SpokenFormEntry]]
+
+# The content of the last snapshot we wrote, so that we can skip no-op writes
+last_snapshot: Optional[bytes] = None
+
+
+def get_fingerprint(paths: list[Path]) -> Fingerprint:
+    fingerprint: Fingerprint = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+            fingerprint[str(path)] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            fingerprint[str(path)] = None
+    return fingerprint
+
+
+def get_snapshot_version() -> str:
+    # Marshal format is specific to the Python version
+    python_version = ".".join(map(str, sys.version_info[:2]))
+    return f"{LISTS_SNAPSHOT_VERSION}:{python_version}"
+
+
+def restore_lists_snapshot(paths: list[Path]) -> Optional[SpokenFormEntries]:
+    """
+    Assign the lists from the last snapshot to our context in a single batch,
+    if the snapshot was taken from the current versions of the given files.
+
+    Args:
+        paths (list[Path]): The files that the lists are computed from
+
+    Returns:
+        Optional[SpokenFormEntries]: The spoken form entries of each csv if
+            the snapshot was restored, in which case reading and validating
+            the csvs can be deferred
+    """
+    global last_snapshot
+
+    try:
+        content = (get_cache_directory() / LISTS_SNAPSHOT_FILENAME).read_bytes()
+        version, fingerprint, lists, entries = marshal.loads(content)
+    except Exception:
+        # Missing, corrupt, or written by a different Python version
+        return None
+
+    if version != get_snapshot_version() or fingerprint != get_fingerprint(paths):
+        return None
+
+    update_context_lists(csv_get_ctx(), lists)
+    last_snapshot = content
+    return {
+        csv_name: [
+            SpokenFormEntry(list_name, id, spoken_forms)
+            for list_name, id, spoken_forms in csv_entries
+        ]
+        for csv_name, csv_entries in entries.items()
+    }
+
+
+def write_lists_snapshot(paths: list[Path], entries: SpokenFormEntries) -> None:
+    """
+    Snapshot the lists currently assigned to our context and the given spoken
+    form entries, along with the fingerprint of the given files
+    """
+    global last_snapshot
+
+    content = marshal.dumps(
+        (
+            get_snapshot_version(),
+            get_fingerprint(paths),
+            get_context_lists(csv_get_ctx()),
+            {
+                csv_name: [
+                    (entry.list_name, entry.id, entry.spoken_forms)
+                    for entry in csv_entries
+                ]
+                for csv_name, csv_entries in entries.items()
+            },
+        )
+    )
+
+    if content == last_snapshot:
+        return
+
+    path = get_cache_directory() / LISTS_SNAPSHOT_FILENAME
+
+    try:
+        write_file_atomically(path, content)
+        last_snapshot = content
+    except Exception as ex:
+        # The snapshot is just an optimization, so we don't bother the user
+        print(f"Error writing lists snapshot {path}: {ex}")
@@ -1,49 +1,179 @@
-from talon import Context, scope
+from typing import Any, Callable
 
-from .csv_overrides import csv_get_ctx, csv_get_normalized_ctx
+from talon import Context, settings
+
+from .csv_overrides import (
+    csv_get_ctx,
+    csv_get_normalized_ctx,
+    get_context_list,
+    is_normalized_ctx_populated,
+    update_context_lists,
+)
+
+# Maps from the name of each list that is merged into the flattened scope type
+# list to the prefix of its values in the flattened list
+LISTS_TO_MERGE = {
+    "cursorless_scope_type": "simple",
+    "cursorless_selectable_only_paired_delimiter": "surroundingPair",
+    "cursorless_wrapper_selectable_paired_delimiter": "surroundingPair",
+    "cursorless_surrounding_pair_scope_type": "surroundingPair",
+    # NB: If the user have no custom regex scope type, then that list is empty
+    "cursorless_custom_regex_scope_type": "customRegex",
+}
+
+
+class FlattenedListMemo:
+    """
+    Memoizes the entries each source list contributes to the flattened scope
+    type lists of one context, keyed by the versions of its inputs, so that we
+    only recompute the entries of source lists that actually changed
+    """
+
+    def __init__(self):
+        # Maps from part name to the key it was computed for and its entries
+        self.parts: dict[str, tuple[Any, dict[str, str]]] = {}
+        # The part entries the current flattened lists were merged from, and
+        # those lists
+        self.merged: dict[str, tuple[list[dict[str, str]], dict[str, str]]] = {}
+
+    def get_part(
+        self,
+        name: str,
+        key: Any,
+        compute: Callable[[], dict[str, str]],
+    ) -> dict[str, str]:
+        cached = self.parts.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        entries = compute()
+        self.parts[name] = (key, entries)
+        return entries
+
+    def merge(self, name: str, parts: list[dict[str, str]]) -> dict[str, str]:
+        cached = self.merged.get(name)
+        if cached is not None and all(
+            part is cached_part
+            for part, cached_part in zip(parts, cached[0], strict=True)
+        ):
+            # Return the same object so that assigning it is a no-op
+            return cached[1]
+        merged: dict[str, str] = {}
+        for part in parts:
+            merged.update(part)
+        self.merged[name] = (parts, merged)
+        return merged
+
+
+# Maps from context id to the memo of its flattened scope type lists
+flattened_list_memos: dict[int, FlattenedListMemo] = {}
+
+# Enables the glyph scope type capture when using the "capture" strategy
+glyph_strategy_ctx = Context()
+glyph_strategy_tags: list[str] = []
+
+# The part we use in place of the glyph entries when they're not flattened
+NO_GLYPH_ENTRIES: dict[str, str] = {}
 
 
 def init_scope_spoken_forms(graphemes_talon_list: dict[str, str]):
-    create_flattened_talon_list(csv_get_ctx(), graphemes_talon_list)
-    if is_cursorless_test_mode():
-        create_flattened_talon_list(csv_get_normalized_ctx(), graphemes_talon_list)
-
-
-def create_flattened_talon_list(ctx: Context, graphemes_talon_list: dict[str, str]):
-    lists_to_merge = {
-        "cursorless_scope_type": "simple",
-        "cursorless_selectable_only_paired_delimiter": "surroundingPair",
-        "cursorless_wrapper_selectable_paired_delimiter": "surroundingPair",
-        "cursorless_surrounding_pair_scope_type": "surroundingPair",
-    }
-    # If the user have no custom regex scope type, then that list is missing from the context
-    if "user.cursorless_custom_regex_scope_type" in ctx.lists.keys():  # noqa: SIM118
-        lists_to_merge["cursorless_custom_regex_scope_type"] = "customRegex"
-
-    scope_types_singular: dict[str, str] = {}
-    scope_types_plural: dict[str, str] = {}
-
-    for list_name, prefix in lists_to_merge.items():
-        for key, value in ctx.lists[f"user.{list_name}"].items():
-            scope_types_singular[key] = f"{prefix}.{value}"
-        for key, value in ctx.lists[f"user.{list_name}_plural"].items():
-            scope_types_plural[key] = f"{prefix}.{value}"
-
-    glyph_singular_spoken_forms = ctx.lists["user.cursorless_glyph_scope_type"]
-    glyph_plural_spoken_forms = ctx.lists["user.cursorless_glyph_scope_type_plural"]
-
-    for grapheme_key, grapheme_value in graphemes_talon_list.items():
-        value = f"glyph.{grapheme_value}"
-        for glyph in glyph_singular_spoken_forms:
-            key = f"{glyph} {grapheme_key}"
-            scope_types_singular[key] = value
-        for glyph in glyph_plural_spoken_forms:
-            key = f"{glyph} {grapheme_key}"
-            scope_types_plural[key] = value
-
-    ctx.lists["user.cursorless_scope_type_flattened"] = scope_types_singular
-    ctx.lists["user.cursorless_scope_type_flattened_plural"] = scope_types_plural
-
-
-def is_cursorless_test_mode():
-    return "user.cursorless_spoken_form_test" in scope.get("mode")
+    global glyph_strategy_tags
+
+    flatten_glyphs = (
+        settings.get("user.cursorless_glyph_scope_type_strategy") != "capture"
+    )
+    tags = [] if flatten_glyphs else ["user.cursorless_glyph_scope_type_capture"]
+    if tags != glyph_strategy_tags:
+        glyph_strategy_ctx.tags = tags
+        glyph_strategy_tags = tags
+
+    create_flattened_talon_list(csv_get_ctx(), graphemes_talon_list, flatten_glyphs)
+    normalized_ctx = csv_get_normalized_ctx()
+    if is_normalized_ctx_populated():
+        create_flattened_talon_list(
+            normalized_ctx, graphemes_talon_list, flatten_glyphs
+        )
+    else:
+        # Its lists are removed by `update_normalized_ctx`
+        flattened_list_memos.pop(id(normalized_ctx), None)
+
+
+def create_flattened_talon_list(
+    ctx: Context,
+    graphemes_talon_list: dict[str, str],
+    flatten_glyphs: bool,
+):
+    memo = flattened_list_memos.setdefault(id(ctx), FlattenedListMemo())
+
+    scope_types_singular: list[dict[str, str]] = []
+    scope_types_plural: list[dict[str, str]] = []
+
+    for list_name, prefix in LISTS_TO_MERGE.items():
+        scope_types_singular.append(
+            get_prefixed_list_part(memo, ctx, f"user.{list_name}", prefix)
+        )
+        scope_types_plural.append(
+            get_prefixed_list_part(memo, ctx, f"user.{list_name}_plural", prefix)
+        )
+
+    if flatten_glyphs:
+        scope_types_singular.append(
+            get_glyph_list_part(
+                memo, ctx, "user.cursorless_glyph_scope_type", graphemes_talon_list
+            )
+        )
+        scope_types_plural.append(
+            get_glyph_list_part(
+                memo,
+                ctx,
+                "user.cursorless_glyph_scope_type_plural",
+                graphemes_talon_list,
+            )
+        )
+    else:
+        # Matched by the capture in `modifiers/scopes.py` instead
+        scope_types_singular.append(NO_GLYPH_ENTRIES)
+        scope_types_plural.append(NO_GLYPH_ENTRIES)
+
+    update_context_lists(
+        ctx,
+        {
+            "user.cursorless_scope_type_flattened": memo.merge(
+                "singular", scope_types_singular
+            ),
+            "user.cursorless_scope_type_flattened_plural": memo.merge(
+                "plural", scope_types_plural
+            ),
+        },
+    )
+
+
+def get_prefixed_list_part(
+    memo: FlattenedListMemo,
+    ctx: Context,
+    list_name: str,
+    prefix: str,
+) -> dict[str, str]:
+    version, values = get_context_list(ctx, list_name)
+    return memo.get_part(
+        list_name,
+        version,
+        lambda: {key: f"{prefix}.{value}" for key, value in values.items()},
+    )
+
+
+def get_glyph_list_part(
+    memo: FlattenedListMemo,
+    ctx: Context,
+    list_name: str,
+    graphemes_talon_list: dict[str, str],
+) -> dict[str, str]:
+    version, glyph_spoken_forms = get_context_list(ctx, list_name)
+    return memo.get_part(
+        list_name,
+        (version, graphemes_talon_list),
+        lambda: {
+            f"{glyph} {grapheme_key}": f"glyph.{grapheme_value}"
+            for grapheme_key, grapheme_value in graphemes_talon_list.items()
+            for glyph in glyph_spoken_forms
+        },
+    )
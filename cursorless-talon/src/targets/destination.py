@@ -2,6 +2,7 @@ from typing import Union
 
 from talon import Module
 
+from ..csv_overrides import get_list_values
 from .target_types import ListDestination, PrimitiveDestination
 
 mod = Module()
@@ -17,10 +18,10 @@ mod.list("cursorless_insertion_mode_to", desc="Cursorless insertion mode to")
     rule="{user.cursorless_insertion_mode_before_after} | {user.cursorless_insertion_mode_to}",
 )
 def cursorless_insertion_mode(m) -> str:
-    try:
-        return m.cursorless_insertion_mode_before_after
-    except AttributeError:
+    value = m[0]
+    if value in get_list_values("user.cursorless_insertion_mode_to"):
         return "to"
+    return value
 
 
 @mod.capture(
@@ -0,0 +1,78 @@
+import assert from "node:assert/strict";
+import { mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import path from "node:path";
+import type { FileSystem, SpokenFormEntry } from "@cursorless/lib-common";
+import { FileSystemTalonSpokenForms } from "./FileSystemTalonSpokenForms";
+
+const spokenFormEntries: SpokenFormEntry[] = [
+  { type: "action", id: "remove", spokenForms: ["chuck"] },
+  { type: "simpleScopeTypeType", id: "namedFunction", spokenForms: ["funk"] },
+  { type: "action", id: "setSelection", spokenForms: ["take", "pick"] },
+];
+
+suite("FileSystemTalonSpokenForms", () => {
+  let tempDir: string;
+  let stateJsonPath: string;
+  let talonSpokenForms: FileSystemTalonSpokenForms;
+
+  setup(async () => {
+    tempDir = await mkdtemp(path.join(tmpdir(), "cursorless-spoken-forms-"));
+    stateJsonPath = path.join(tempDir, "state.json");
+    const fileSystem: FileSystem = {
+      readBundledFile: () => Promise.resolve(undefined),
+      watchDir: () => ({ dispose: () => {} }),
+      cursorlessTalonStateJsonPath: stateJsonPath,
+      cursorlessCommandHistoryDirPath: path.join(tempDir, "commandHistory"),
+    };
+    talonSpokenForms = new FileSystemTalonSpokenForms(fileSystem);
+  });
+
+  teardown(async () => {
+    talonSpokenForms.dispose();
+    await rm(tempDir, { recursive: true, force: true });
+  });
+
+  test("version 0", async () => {
+    await writeFile(
+      stateJsonPath,
+      JSON.stringify({ version: 0, spokenForms: spokenFormEntries }),
+    );
+
+    assert.deepStrictEqual(
+      await talonSpokenForms.getSpokenFormEntries(),
+      spokenFormEntries,
+    );
+  });
+
+  test("version 1", async () => {
+    await writeFile(
+      stateJsonPath,
+      JSON.stringify({
+        version: 1,
+        types: ["action", "simpleScopeTypeType"],
+        spokenForms: [
+          [0, "remove", ["chuck"]],
+          [1, "namedFunction", ["funk"]],
+          [0, "setSelection", ["take", "pick"]],
+        ],
+      }),
+    );
+
+    assert.deepStrictEqual(
+      await talonSpokenForms.getSpokenFormEntries(),
+      spokenFormEntries,
+    );
+  });
+
+  test("unsupported version", async () => {
+    await writeFile(
+      stateJsonPath,
+      JSON.stringify({ version: 2, spokenForms: [] }),
+    );
+
+    await assert.rejects(talonSpokenForms.getSpokenFormEntries(), {
+      message: "Invalid spoken forms version. Expected at most 1 but got 2",
+    });
+  });
+});
@@ -10,12 +10,27 @@ import type {
 import { NeedsInitialTalonUpdateError, Notifier } from "@cursorless/lib-common";
 import { isEnoentError } from "./isError";
 
-interface TalonSpokenFormsPayload {
-  version: number;
+interface TalonSpokenFormsPayloadV0 {
+  version: 0;
   spokenForms: SpokenFormEntry[];
 }
 
-const LATEST_SPOKEN_FORMS_JSON_VERSION = 0;
+/**
+ * Compact payload, written by Talon if the user opts in. Entry types are
+ * interned: each entry is a `[typeIndex, id, spokenForms]` triple, where
+ * `typeIndex` indexes into `types`.
+ */
+interface TalonSpokenFormsPayloadV1 {
+  version: 1;
+  types: SpokenFormEntry["type"][];
+  spokenForms: [number, SpokenFormEntry["id"], string[]][];
+}
+
+type TalonSpokenFormsPayload =
+  | TalonSpokenFormsPayloadV0
+  | TalonSpokenFormsPayloadV1;
+
+const LATEST_SPOKEN_FORMS_JSON_VERSION = 1;
 
 export class FileSystemTalonSpokenForms implements TalonSpokenForms {
   private disposable: Disposable;
@@ -53,14 +68,26 @@ export class FileSystemTalonSpokenForms implements TalonSpokenForms {
       throw error;
     }
 
-    if (payload.version !== LATEST_SPOKEN_FORMS_JSON_VERSION) {
-      // In the future, we'll need to handle migrations. Not sure exactly how yet.
-      throw new Error(
-        `Invalid spoken forms version. Expected ${LATEST_SPOKEN_FORMS_JSON_VERSION} but got ${payload.version}`,
-      );
+    switch (payload.version) {
+      case 0:
+        return payload.spokenForms;
+      case 1: {
+        const { types } = payload;
+        return payload.spokenForms.map(
+          ([typeIndex, id, spokenForms]) =>
+            ({
+              type: types[typeIndex],
+              id,
+              spokenForms,
+            }) as SpokenFormEntry,
+        );
+      }
+      default:
+        // In the future, we'll need to handle migrations. Not sure exactly how yet.
+        throw new Error(
+          `Invalid spoken forms version. Expected at most ${LATEST_SPOKEN_FORMS_JSON_VERSION} but got ${(payload as { version: unknown }).version}`,
+        );
     }
-
-    return payload.spokenForms;
   }
 
   dispose() {